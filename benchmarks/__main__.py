@@ -0,0 +1,57 @@
+"""Run the benchmark suite headless
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --quick --baseline results.json
+
+The exit status is 1 when a case regresses against the baseline.
+"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import argparse
+import json
+import sys
+
+from benchmarks.cases import all_cases
+from benchmarks.runner import run_benchmarks, compare
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n')[0])
+    parser.add_argument('--quick', action='store_true', help='small grid, for smoke runs')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, the best one is kept')
+    parser.add_argument('--filter', default='', help='only run the cases whose key contains this string')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare the results with this JSON results file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative throughput drop or memory growth counted as a regression')
+    args = parser.parse_args(argv)
+
+    def log(line):
+        print(line, file=sys.stderr)
+
+    cases = [case for case in all_cases(args.quick) if args.filter in case.key()]
+    results = run_benchmarks(cases, args.repeat, log)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['comparison'] = compare(results, json.load(f), args.tolerance)
+        for row in results['comparison']:
+            log('%-70s throughput x%.2f  memory x%.2f%s' % (row['key'], row['throughput_ratio'],
+                                                           row['peak_memory_ratio'],
+                                                           '  REGRESSION' if row['regression'] else ''))
+        regressions = [row['key'] for row in results['comparison'] if row['regression']]
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Benchmark cases of the drift detectors and of the prequential evaluation"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import itertools
+import warnings
+
+import numpy as np
+from sklearn.naive_bayes import GaussianNB
+
+from classifiers.detector_classifier import DetectorClassifier
+from drift_detector.adwin import Adwin
+from drift_detector.DDM import DDM
+from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
+from evluation.instrumentation import Instrumentation
+from evluation.prequential import prequential_evaluation
+from streams.generators import evenly_spaced, BernoulliStream, SEAStream
+
+
+def error_stream(n, drift_rate, seed=0):
+    """A 0/1 error stream whose error rate jumps to a new random level drift_rate times per sample"""
+    return BernoulliStream(n, evenly_spaced(n, int(round(n * drift_rate))), seed=seed).generate()
+
+
+def classification_stream(n, drift_rate, seed=0):
+    """A SEA classification stream changing concept drift_rate times per sample"""
+    return SEAStream(n, evenly_spaced(n, int(round(n * drift_rate))), seed=seed).generate()
+
+
+class Case(object):
+    """A benchmark case: setup() prepares the input and returns run(), which processes it
+    and returns the number of processed samples."""
+
+    def __init__(self, name, params, setup):
+        self.name = name
+        self.params = params
+        self.setup = setup
+
+    def key(self):
+        return '%s[%s]' % (self.name, ','.join('%s=%s' % (k, self.params[k]) for k in sorted(self.params)))
+
+
+def _detector_case(name, params, make_detector, api='set_input'):
+    def setup():
+        values = error_stream(params['n'], params['drift_rate'])
+        samples = values.tolist()
+        detector = make_detector()
+
+        def run():
+            if api == 'set_input_many':
+                detector.set_input_many(values)
+            else:
+                set_input = detector.set_input
+                for value in samples:
+                    set_input(value)
+            return len(values)
+        return run
+    return Case(name, params, setup)
+
+
+def _prequential_case(params):
+    def setup():
+        X, Y = classification_stream(params['n'] + params['n_train'], params['drift_rate'])
+        H = [DetectorClassifier(GaussianNB(), Adwin()), DetectorClassifier(GaussianNB(), DDM())]
+
+        def run():
+            # the classifiers restarted after a drift warn about missing classes
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                prequential_evaluation(X, Y, H, params['n_train'], Instrumentation(),
+                                       batch_size=params['batch_size'])
+            return params['n'] * len(H)
+        return run
+    return Case('prequential_evaluation', params, setup)
+
+
+def all_cases(quick=False):
+    """The benchmark grid, quick=True gives a small grid for smoke runs"""
+    lengths = (5000,) if quick else (10000, 100000)
+    drift_rates = (0.0, 0.001) if quick else (0.0, 0.0001, 0.001)
+    deltas = (0.01,) if quick else (0.002, 0.01, 0.1)
+    sizes = (32,) if quick else (8, 32)
+    cases = []
+    for n, drift_rate, delta in itertools.product(lengths, drift_rates, deltas):
+        params = {'n': n, 'drift_rate': drift_rate, 'delta': delta}
+        cases.append(_detector_case('adwin.set_input', params, lambda delta=delta: Adwin(delta)))
+        cases.append(_detector_case('adwin.set_input_many', params, lambda delta=delta: Adwin(delta),
+                                    api='set_input_many'))
+    for n, drift_rate in itertools.product(lengths, drift_rates):
+        params = {'n': n, 'drift_rate': drift_rate}
+        cases.append(_detector_case('ddm.set_input', params, DDM))
+        cases.append(_detector_case('ddm.set_input_many', params, DDM, api='set_input_many'))
+    for n, drift_rate, size in itertools.product(lengths, drift_rates, sizes):
+        params = {'n': n, 'drift_rate': drift_rate, 'size': size}
+        cases.append(_detector_case('volatility_detector.set_input', params,
+                                    lambda size=size: VolatilityDetector(Adwin(), size, seed=0)))
+    for n, drift_rate, batch_size in itertools.product((500,) if quick else (2000, 10000), drift_rates, (1, 50)):
+        params = {'n': n, 'n_train': 200, 'drift_rate': drift_rate, 'batch_size': batch_size}
+        cases.append(_prequential_case(params))
+    return cases
@@ -0,0 +1,83 @@
+"""Timing, peak memory and baseline comparison of the benchmark cases"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+RESULTS_VERSION = 1
+
+
+def measure(case, repeat=3):
+    """Run a case, keeping the best of repeat timed runs
+
+    The peak memory comes from one more run under tracemalloc, so that tracing
+    does not slow down the timed runs. It counts the allocations made while
+    processing the input, not the input itself.
+
+    Returns
+    -------
+    result : dict
+        key, name and params of the case, number of samples, best running time
+        in seconds, throughput in samples per second and peak memory in bytes.
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        run = case.setup()
+        start = perf_counter()
+        samples = run()
+        seconds = min(seconds, perf_counter() - start)
+    run = case.setup()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'key': case.key(), 'name': case.name, 'params': case.params, 'samples': samples,
+            'seconds': seconds, 'throughput': samples / seconds, 'peak_memory': peak}
+
+
+def run_benchmarks(cases, repeat=3, log=None):
+    """Measure every case, returns the JSON-serializable results document"""
+    results = []
+    for case in cases:
+        result = measure(case, repeat)
+        if log is not None:
+            log('%-70s %12.0f samples/s %10d B' % (result['key'], result['throughput'], result['peak_memory']))
+        results.append(result)
+    return {'version': RESULTS_VERSION, 'python': sys.version.split()[0], 'numpy': np.__version__,
+            'platform': platform.platform(), 'machine': platform.machine(), 'results': results}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Compare the results with a baseline results document
+
+    A case regresses when its throughput drops, or its peak memory grows, by
+    more than tolerance relatively to the baseline. Cases missing from the
+    baseline are skipped.
+
+    Returns
+    -------
+    comparison : list of dict
+        key, throughput and peak memory ratios (current / baseline) and
+        regression flag of each case found in the baseline.
+    """
+    reference = dict((r['key'], r) for r in baseline['results'])
+    comparison = []
+    for result in results['results']:
+        base = reference.get(result['key'])
+        if base is None:
+            continue
+        throughput = result['throughput'] / base['throughput']
+        memory = result['peak_memory'] / float(base['peak_memory']) if base['peak_memory'] else 1.0
+        comparison.append({'key': result['key'], 'throughput_ratio': throughput, 'peak_memory_ratio': memory,
+                           'regression': throughput < 1 - tolerance or memory > 1 + tolerance})
+    return comparison
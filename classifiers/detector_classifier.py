@@ -5,10 +5,11 @@
 #          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
 # License: BSD 3 clause
 
+from collections import deque
+
 import numpy as np
 
 from sklearn import clone
-from sklearn.metrics import accuracy_score
 
 
 class DetectorClassifier():
@@ -16,19 +17,32 @@ class DetectorClassifier():
     A detector classifier is a classifier combined with a drift detector.
     This class serves as wrapper to combine a classifier and a drift detector together.
     """
-    def __init__(self, clf, drift_detector):
+    def __init__(self, clf, drift_detector, buffer_size=500):
         """
         Initialize a detector classifier.
 
+        While the drift detector is in its warning zone (see DDM.is_warning_zone), a background
+        classifier is trained on the incoming samples and takes over as soon as the drift is
+        confirmed, instead of a new classifier starting from scratch.
+
         Parameters
         ----------
         clf: a classifier, like Naive Bayes classifier
         drift_detector: a drift detector, like adwin, DDM
+        buffer_size: int
+            Number of recent warning-zone samples kept for the background classifier.
+            When the warning lasts longer, the background classifier is rebuilt from these samples.
         """
         self.classes = None
         self.clf = clf
         self.drift_detector = drift_detector
         self.num_change_detected = 0
+        self.drift_index = np.zeros(0, dtype=int)
+        self.buffer_size = buffer_size
+        self.background = None
+        self.background_count = 0
+        self.buffer = deque()
+        self.buffer_count = 0
 
     def fit(self, X, y):
         """Fit drift detector classifier according to X, y
@@ -64,6 +78,10 @@ class DetectorClassifier():
         as large as possible (as long as fitting in the memory budget) to
         hide the overhead.
 
+        The 0/1 errors of the current classifier on X are sent to the drift
+        detector in one call; afterwards drift_index holds the positions in X
+        where the detector found a drift.
+
         Parameters
         ----------
         X : array-like, shape(n_samples, n_features)
@@ -78,16 +96,59 @@ class DetectorClassifier():
             return self.
         """
         pre_y = self.clf.predict(X)
-        if self.drift_detector.set_input(accuracy_score(pre_y, y)):
-            self.num_change_detected += 1
-            self.clf = clone(self.clf)
+        # the detector gets one 0/1 error value per sample, even for a batch
+        error = np.any(pre_y.reshape(len(pre_y), -1) != np.asarray(y).reshape(len(pre_y), -1), axis=1) * 1.
+        if hasattr(self.drift_detector, 'set_input_many'):
+            self.drift_index = np.asarray(self.drift_detector.set_input_many(error)[0], dtype=int)
+        else:
+            self.drift_index = np.flatnonzero([self.drift_detector.set_input(e) for e in error.tolist()])
+        self.num_change_detected += len(self.drift_index)
+        drift_index = self.drift_index[-1] if len(self.drift_index) > 0 else None
+        if drift_index is not None:
+            if self.background is not None:
+                # the background classifier has learnt the samples of the warning zone
+                self.clf = self.background
+            else:
+                self.clf = clone(self.clf)
             # print("change detected...")
             # self.clf.fit(X, y)
-            self.clf.partial_fit(X, y, classes=self.classes)
+            # the new classifier learns from the samples since the last drift
+            self.clf.partial_fit(X[drift_index:], y[drift_index:], classes=self.classes)
+            self._stop_background()
         else:
             self.clf.partial_fit(X, y)
+            if getattr(self.drift_detector, 'is_warning_zone', False):
+                self._train_background(X, y)
+            elif self.background is not None:
+                self._stop_background()
         return self
 
+    def _train_background(self, X, y):
+        """Train the background classifier on a batch of warning-zone samples"""
+        # copies, as the caller may reuse its arrays, or they may be views of shared memory or a memmap
+        X = np.array(X, copy=True)
+        y = np.array(y, copy=True)
+        self.buffer.append((X, y))
+        self.buffer_count += len(X)
+        while self.buffer_count - len(self.buffer[0][0]) >= self.buffer_size:
+            self.buffer_count -= len(self.buffer.popleft()[0])
+        self.background_count += len(X)
+        if self.background is None or self.background_count > 2 * self.buffer_size:
+            # (re)start from the buffered samples, the background classifier never
+            # learns from more than about twice buffer_size samples
+            self.background = clone(self.clf)
+            self.background.partial_fit(np.concatenate([b[0] for b in self.buffer]),
+                                        np.concatenate([b[1] for b in self.buffer]), classes=self.classes)
+            self.background_count = self.buffer_count
+        else:
+            self.background.partial_fit(X, y)
+
+    def _stop_background(self):
+        self.background = None
+        self.background_count = 0
+        self.buffer.clear()
+        self.buffer_count = 0
+
     def predict(self, X):
         """
         Perform prediction on an array of test vectors X.
@@ -8,9 +8,16 @@
 
 import sys
 import math
+import struct
 
+import numpy as np
 
-class DDM:
+from drift_detector.bank_utils import split_rounds
+from drift_detector.detector_stats import StatsMixin
+from drift_detector.snapshot import pack_header, unpack_header
+
+
+class DDM(StatsMixin):
     """
     The drift detection method (DDM) controls the number of errors
     produced by the learning model during prediction. It compares
@@ -27,8 +34,14 @@ class DDM:
     S. (eds.) SBIA 2004. LNCS (LNAI), vol. 3171, pp. 286–295. Springer, Heidelberg (2004)
     """
 
-    def __init__(self):
+    SNAPSHOT_TAG = b'DM'
+    SNAPSHOT_VERSION = 1
+    _SNAPSHOT = struct.Struct('<q7d3?')
+    _STATS_METHODS = ('set_input', 'set_input_many', 'reset')
+
+    def __init__(self, collect_stats=False):
         self.m_n = 1
+        self.m_sum = 0.0
         self.m_p = 1
         self.m_s = 0
         self.m_psmin = sys.float_info.max
@@ -38,6 +51,9 @@ class DDM:
         self.is_initialized = True
         self.estimation = 0.0
         self.is_warning_zone = False
+        self._stats = None
+        if collect_stats:
+            self.enable_stats()
 
     def set_input(self, prediction):
         """
@@ -61,7 +77,8 @@ class DDM:
             self.reset()
             self.is_initialized = True
 
-        self.m_p += (prediction - self.m_p) / float(self.m_n)
+        self.m_sum += prediction
+        self.m_p = self.m_sum / float(self.m_n)
         self.m_s = math.sqrt(self.m_p * (1 - self.m_p) / float(self.m_n))
 
         self.m_n += 1
@@ -85,11 +102,254 @@ class DDM:
 
         return self.change_detected
 
+    def set_input_many(self, predictions):
+        """
+        Add a sequence of predictions, one after the other.
+
+        Within the stretch between two resets, the error rates p(t) and s(t) come
+        from a cumulative sum of the predictions and p(min), s(min) from a running
+        minimum of p(t) + s(t), so the warning and drift levels of a whole chunk are
+        tested at once. The results are the same as with repeated calls to set_input().
+
+        Parameters
+        ----------
+        predictions : array-like or iterable of new elements
+
+        Returns
+        -------
+        drift_index : array of int
+            Positions in predictions where a change was detected.
+        warning_index : array of int
+            Positions in predictions where the warning level was reached.
+        """
+        if not isinstance(predictions, np.ndarray):
+            predictions = np.fromiter(predictions, dtype=float)
+        predictions = predictions.astype(float, copy=False)
+        drift_index = []
+        warning_index = []
+        start = 0
+        chunk = 256
+        while start < len(predictions):
+            if self.change_detected is True or self.is_initialized is False:
+                self.reset()
+                self.is_initialized = True
+            x = predictions[start:start + chunk]
+            total = np.add.accumulate(np.concatenate(([float(self.m_sum)], x)))[1:]
+            n = self.m_n + np.arange(len(x), dtype=float)
+            p = total / n
+            s = np.sqrt(p * (1 - p) / n)
+            stop = len(x)
+
+            # only the predictions from the 30th one on are tested
+            first = max(0, 29 - self.m_n)
+            if first < len(x):
+                ps = p[first:] + s[first:]
+                psmin = np.minimum.accumulate(np.concatenate(([self.m_psmin], ps)))
+                update = ps <= psmin[:-1]
+                last = np.maximum.accumulate(np.where(update, np.arange(len(ps)), -1))
+                pmin = np.where(last >= 0, p[first:][last], self.m_pmin)
+                smin = np.where(last >= 0, s[first:][last], self.m_smin)
+                drift = ps > pmin + 3 * smin
+                warning = ps > pmin + 2 * smin
+                change = np.flatnonzero(drift)
+                tested = len(ps)
+                if len(change) > 0:
+                    tested = change[0] + 1
+                    stop = first + tested
+                    drift_index.append(start + stop - 1)
+                    self.change_detected = True
+                    if tested > 1:
+                        self.is_warning_zone = bool(warning[tested - 2])
+                else:
+                    self.change_detected = False
+                    self.is_warning_zone = bool(warning[-1])
+                warning_index.append(start + first + np.flatnonzero(warning[:tested] & ~drift[:tested]))
+                self.m_psmin = float(psmin[tested])
+                self.m_pmin = float(pmin[tested - 1])
+                self.m_smin = float(smin[tested - 1])
+            else:
+                self.change_detected = False
+
+            self.m_sum = float(total[stop - 1])
+            self.m_p = float(p[stop - 1])
+            self.m_s = float(s[stop - 1])
+            self.m_n += stop
+            self.estimation = self.m_p
+            start += stop
+            chunk = 256 if self.change_detected else 2 * chunk
+        return np.array(drift_index, dtype=int), np.concatenate([np.zeros(0, dtype=int)] + warning_index)
+
+    def to_bytes(self):
+        """
+        Snapshot of the detector state.
+
+        Returns
+        -------
+        bytes: a versioned binary layout of the statistics, see from_bytes().
+        """
+        return pack_header(self.SNAPSHOT_TAG, self.SNAPSHOT_VERSION) + self._SNAPSHOT.pack(
+            self.m_n, self.m_sum, self.m_p, self.m_s, self.m_psmin, self.m_pmin, self.m_smin, self.estimation,
+            self.change_detected, self.is_initialized, self.is_warning_zone)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Restore a detector from a snapshot written by to_bytes().
+
+        Parameters
+        ----------
+        data : bytes-like object
+
+        Returns
+        -------
+        DDM: a detector in the same state as the one of the snapshot.
+        """
+        offset = unpack_header(data, cls.SNAPSHOT_TAG, cls.SNAPSHOT_VERSION)
+        ddm = cls()
+        (ddm.m_n, ddm.m_sum, ddm.m_p, ddm.m_s, ddm.m_psmin, ddm.m_pmin, ddm.m_smin, ddm.estimation,
+         ddm.change_detected, ddm.is_initialized, ddm.is_warning_zone) = cls._SNAPSHOT.unpack_from(data, offset)
+        return ddm
+
+    def _stats_callbacks(self, stats):
+        stats.counters.update(samples=0, drifts=0, warnings=0)
+
+        def after_input(args, change_detected):
+            stats.count('samples')
+            if change_detected:
+                stats.count('drifts')
+            elif self.is_warning_zone:
+                stats.count('warnings')
+
+        def after_input_many(args, result):
+            stats.count('samples', len(args[0]))
+            stats.count('drifts', len(result[0]))
+            stats.count('warnings', len(result[1]))
+
+        return {'set_input': after_input, 'set_input_many': after_input_many}
+
+    def stats(self):
+        """
+        Statistics and, when enabled, the hot-path counters.
+
+        Returns
+        -------
+        stats : dict
+            n and estimation of the current concept. With the counters enabled,
+            also 'calls' and 'seconds' spent in set_input, set_input_many and
+            reset, and the number of samples, drifts and samples in the warning zone.
+        """
+        stats = {'n': self.m_n, 'estimation': self.estimation}
+        if self._stats is not None:
+            stats.update(self._stats.report())
+        return stats
+
     def reset(self):
         """reset the DDM drift detector"""
         self.m_n = 1
+        self.m_sum = 0.0
         self.m_p = 1
         self.m_s = 0
         self.m_psmin = sys.float_info.max
         self.m_pmin = sys.float_info.max
         self.m_smin = sys.float_info.max
+        self.is_warning_zone = False
+
+
+class DDMBank:
+    """
+    Many DDM detectors, one per stream, whose statistics are kept in arrays.
+
+    Every stream behaves exactly like a standalone DDM; a tick of
+    (stream_id, prediction) pairs updates all the streams it touches at once.
+    """
+
+    def __init__(self, n_streams):
+        """
+        Initialize the statistics of every stream.
+
+        Parameters
+        ----------
+        n_streams : int
+            Number of monitored streams, identified by 0 .. n_streams - 1.
+        """
+        self.n_streams = n_streams
+        self.m_n = np.ones(n_streams, dtype=np.int64)
+        self.m_sum = np.zeros(n_streams)
+        self.m_p = np.ones(n_streams)
+        self.m_s = np.zeros(n_streams)
+        self.m_psmin = np.full(n_streams, sys.float_info.max)
+        self.m_pmin = np.full(n_streams, sys.float_info.max)
+        self.m_smin = np.full(n_streams, sys.float_info.max)
+        self.change_detected = np.zeros(n_streams, dtype=bool)
+        self.estimation = np.zeros(n_streams)
+        self.is_warning_zone = np.zeros(n_streams, dtype=bool)
+
+    def set_input(self, stream_ids, predictions):
+        """
+        Add one tick of (stream_id, prediction) pairs, see DDM.set_input().
+
+        A stream may appear several times in the same tick, its predictions are
+        then added in the given order.
+
+        Parameters
+        ----------
+        stream_ids : array-like of int, shape = [n_pairs]
+        predictions : array-like, shape = [n_pairs]
+
+        Returns
+        -------
+        change_detected : array of bool, shape = [n_pairs]
+                    True for the pairs whose prediction made their stream detect a change.
+        """
+        stream_ids = np.asarray(stream_ids, dtype=np.int64)
+        predictions = np.asarray(predictions, dtype=float)
+        change_detected = np.zeros(len(stream_ids), dtype=bool)
+        for pairs in split_rounds(stream_ids):
+            change_detected[pairs] = self._update(stream_ids[pairs], predictions[pairs])
+        return change_detected
+
+    def reset(self, stream_ids=None):
+        """reset the DDM drift detector of the given streams, all of them by default"""
+        if stream_ids is None:
+            stream_ids = slice(None)
+        self.m_n[stream_ids] = 1
+        self.m_sum[stream_ids] = 0.0
+        self.m_p[stream_ids] = 1
+        self.m_s[stream_ids] = 0
+        self.m_psmin[stream_ids] = sys.float_info.max
+        self.m_pmin[stream_ids] = sys.float_info.max
+        self.m_smin[stream_ids] = sys.float_info.max
+        self.is_warning_zone[stream_ids] = False
+
+    def _update(self, ids, predictions):
+        self.reset(ids[self.change_detected[ids]])
+
+        n = self.m_n[ids]
+        total = self.m_sum[ids] + predictions
+        p = total / n
+        s = np.sqrt(p * (1 - p) / n)
+        self.m_sum[ids] = total
+        self.m_p[ids] = p
+        self.m_s[ids] = s
+        self.m_n[ids] = n + 1
+        self.estimation[ids] = p
+        self.change_detected[ids] = False
+
+        change = np.zeros(len(ids), dtype=bool)
+        tested = np.flatnonzero(n + 1 >= 30)
+        ids = ids[tested]
+        p = p[tested]
+        s = s[tested]
+        ps = p + s
+        update = ps <= self.m_psmin[ids]
+        self.m_pmin[ids[update]] = p[update]
+        self.m_smin[ids[update]] = s[update]
+        self.m_psmin[ids[update]] = ps[update]
+
+        pmin = self.m_pmin[ids]
+        smin = self.m_smin[ids]
+        change[tested] = ps > pmin + 3 * smin
+        self.change_detected[ids] = change[tested]
+        still = ~change[tested]
+        self.is_warning_zone[ids[still]] = (ps > pmin + 2 * smin)[still]
+        return change
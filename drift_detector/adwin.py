@@ -6,11 +6,19 @@
 # License: BSD 3 clause
 
 import math
+import struct
+from array import array
+from itertools import chain
 
-from drift_detector.adwin_list import AdwinList
+import numpy as np
 
+from drift_detector.adwin_buckets import AdwinBuckets
+from drift_detector.adwin_schedulers import SCHEDULERS
+from drift_detector.detector_stats import StatsMixin
+from drift_detector.snapshot import pack_header, unpack_header
 
-class Adwin(object):
+
+class Adwin(StatsMixin):
     """The Adwin algorithm is a change detector and estimator.
     It keeps a sliding (variable-length) window with the most
     recently read example,with the property that the window
@@ -31,20 +39,53 @@ class Adwin(object):
     https://sites.google.com/site/zliobaitefiles/cdMOA-CR.pdf?attredirects=0
     """
 
-    def __init__(self, delta=0.01):
+    SNAPSHOT_TAG = b'AD'
+    SNAPSHOT_VERSION = 1
+    _SNAPSHOT = struct.Struct('<9d5q')
+    _SNAPSHOT_BOUNDS = struct.Struct('<qq')
+    _SNAPSHOT_SCHEDULER = struct.Struct('<B5d')
+    # number of samples set_input_many() checks at once, between two drifts it doubles up to the largest
+    _MIN_BLOCK = 8
+    _MAX_BLOCK = 64
+    _STATS_METHODS = ('insert_element', 'compress_buckets', 'check_drift', 'cut_expression', 'delete_element',
+                      'evict_buckets')
+
+    def __init__(self, delta=0.01, collect_stats=False, max_window=None, max_rows=None, scheduler=None):
         """Init the buckets
 
         Parameters
         ----------
         delta : float
             confidence value.
+        collect_stats : bool
+            Count the hot-path operations from the start, see enable_stats().
+        max_window : int, optional
+            Upper bound of the length of window. Past it, the oldest buckets are
+            dropped, so the window ends up between max_window minus the size of
+            the oldest bucket and max_window.
+        max_rows : int, optional
+            Upper bound of the number of bucket rows, past it the oldest row is dropped.
+        scheduler : optional
+            Decides after which samples the window is checked for a cut, see
+            adwin_schedulers; every mint_clock samples by default. The cut test
+            is the same whatever the scheduler, and drift_position tells where
+            the new window starts even when the cut is found late.
+
+        With max_window or max_rows, the bucket arrays are allocated once
+        for the largest possible window and never grow.
         """
+        if max_window is not None and max_window < 1:
+            raise ValueError("max_window must be at least 1")
+        if max_rows is not None and max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
 
         self.mint_clock = 1.0
         self.min_window_length = 16
         self.delta = delta
         self.max_number_of_buckets = 5
-        self.bucket_list = AdwinList(self.max_number_of_buckets)
+        self.max_window = max_window
+        self.max_rows = max_rows
+        self.bucket_list = AdwinBuckets(self.max_number_of_buckets, self._row_capacity())
         self.mint_time = 0.0
         self.min_clock = self.mint_clock
         self.mdbl_error = 0.0
@@ -54,6 +95,12 @@ class Adwin(object):
         self.width = 0.0
         self.variance = 0.0
         self.bucket_number = 0
+        self.scheduler = scheduler
+        self.drift_position = -1
+        self.drift_positions = np.zeros(0, dtype=int)
+        self._stats = None
+        if collect_stats:
+            self.enable_stats()
 
     def get_estimation(self):
         """Get the estimation value"""
@@ -75,16 +122,381 @@ class Adwin(object):
         """
         self.insert_element(value)
         self.compress_buckets()
+        if self.max_window is not None or self.max_rows is not None:
+            self.evict_buckets()
         return self.check_drift()
 
+    def set_input_many(self, values):
+        """Add a sequence of elements, one after the other
+
+        Gives exactly the same results as repeated calls to set_input(). The
+        insertion, merging and eviction of the buckets run inline, on Python
+        lists of the bucket rows, without any method call or numpy access per
+        sample. Without a scheduler, the cut checks of a block of samples are
+        then done at once, on the windows those samples would give if none of
+        them was a drift; only the first sample found to be a drift goes through
+        check_drift(), and the next block starts after it. With a scheduler, the
+        window is only scanned at the samples it asks for. With the counters of
+        enable_stats() on, the samples go through the plain methods, so they are
+        counted.
+
+        Parameters
+        ----------
+        values : array-like or iterable of real values
+
+        Returns
+        -------
+        drift_index : array of int
+            Positions in values where a drift was detected. The positions in the
+            stream where the new windows start are kept in drift_positions.
+        estimation : float
+            The estimation value after the last element.
+        width : float
+            The length of window after the last element.
+        """
+        if not isinstance(values, np.ndarray):
+            values = np.fromiter(values, dtype=float)
+        values = values.astype(float, copy=False).tolist()
+        drift_index = []
+        drift_positions = []
+        if self._stats is not None:
+            bounded = self.max_window is not None or self.max_rows is not None
+            for t, value in enumerate(values):
+                self.insert_element(value)
+                self.compress_buckets()
+                if bounded:
+                    self.evict_buckets()
+                if self.check_drift():
+                    drift_index.append(t)
+                    drift_positions.append(self.drift_position)
+        elif self.scheduler is None:
+            self._set_input_blocks(values, drift_index, drift_positions)
+        else:
+            self._set_input_scheduled(values, drift_index, drift_positions)
+        self.drift_positions = np.array(drift_positions, dtype=int)
+        return np.array(drift_index, dtype=int), self.get_estimation(), self.width
+
+    def _set_input_blocks(self, values, drift_index, drift_positions):
+        """set_input_many() without a scheduler: blocks of samples advanced together, then checked at once"""
+        block = self._MIN_BLOCK
+        t = 0
+        state = self._get_state()
+        while t < len(values):
+            stop = min(t + block, len(values))
+            saved = self._copy_state(state)
+            records = ([], [], [], [], [], [])
+            state, _, _ = self._advance(state, values, t, stop, records=records)
+            first = self._first_cut(*records)
+            if first is None:
+                t = stop
+                block = min(2 * block, self._MAX_BLOCK)
+                continue
+            # replay up to the drift, which check_drift() then handles like set_input()
+            state, _, _ = self._advance(saved, values, t, first + 1)
+            self._set_state(state)
+            if self.check_drift():
+                drift_index.append(first)
+                drift_positions.append(self.drift_position)
+            state = self._get_state()
+            t = first + 1
+            block = self._MIN_BLOCK
+        self._set_state(state)
+
+    def _set_input_scheduled(self, values, drift_index, drift_positions):
+        """set_input_many() with a scheduler: the window is only scanned when the scheduler asks for it"""
+        scheduler = self.scheduler
+        state = self._get_state()
+        t = 0
+        while t < len(values):
+            state, t, due = self._advance(state, values, t, len(values), scheduler=scheduler)
+            if due:
+                self._set_state(state)
+                change = self._check_window()
+                scheduler.checked(self, change)
+                if change:
+                    drift_index.append(t - 1)
+                    drift_positions.append(self.drift_position)
+                state = self._get_state()
+        self._set_state(state)
+
+    def _get_state(self):
+        """The window as local Python values for _advance()"""
+        size, total, variance = self.bucket_list.rows()
+        return [self.width, self.sum, self.variance, self.bucket_number, self.mint_time, size, total, variance]
+
+    def _set_state(self, state):
+        self.width, self.sum, self.variance, self.bucket_number, self.mint_time, size, total, variance = state
+        self.bucket_list.set_rows(size, total, variance)
+        self.last_bucket_row = len(size) - 1
+
+    @staticmethod
+    def _copy_state(state):
+        return state[:5] + [state[5][:], [row[:] for row in state[6]], [row[:] for row in state[7]]]
+
+    def _advance(self, state, values, start, stop, records=None, scheduler=None):
+        """
+        Insert values[start:stop], with the same arithmetic as insert_element(),
+        compress_buckets() and evict_buckets(), moving the clock of check_drift()
+        forward as if no sample was a drift.
+
+        With records, a tuple of six lists, every sample due for a cut check
+        adds its index, width, sum and variance, then the sizes of its rows and
+        the sums of its buckets from the tail, one sample after the other.
+        With a scheduler, the samples stop after the first one due for a cut
+        check. Otherwise the clock of the last sample is left to check_drift().
+
+        Returns
+        -------
+        state : the window after the last sample
+        end : index after the last sample
+        due : whether the last sample is due for a cut check, with a scheduler
+        """
+        width, total, variance, bucket_number, mint_time, size, row_sum, row_variance = state
+        full = self.max_number_of_buckets + 1
+        max_window = self.max_window
+        max_rows = self.max_rows
+        bounded = max_window is not None or max_rows is not None
+        min_clock = self.min_clock
+        min_window_length = self.min_window_length
+        last_clock = stop - 1 if records is None and scheduler is None else stop
+        due = False
+        if records is not None:
+            index, widths, totals, variances, lengths, bucket_sums = records
+        for t in range(start, stop):
+            value = values[t]
+            # insert_element
+            width += 1
+            row_sum[0].append(value)
+            row_variance[0].append(0.0)
+            size[0] += 1
+            bucket_number += 1
+            if width > 1:
+                variance += (width - 1) * (value - total / (width - 1)) * (value - total / (width - 1)) / width
+            total += value
+            # compress_buckets: one merge, in the first full row
+            if full in size:
+                i = size.index(full)
+                if i == len(size) - 1:
+                    size.append(0)
+                    row_sum.append([])
+                    row_variance.append([])
+                n1 = 1 << i
+                merged_sum = row_sum[i]
+                merged_variance = row_variance[i]
+                u1 = merged_sum[0] / n1
+                u2 = merged_sum[1] / n1
+                internal_variance = n1 * n1 * (u1 - u2) * (u1 - u2) / (n1 + n1)
+                row_sum[i + 1].append(merged_sum[0] + merged_sum[1])
+                row_variance[i + 1].append(merged_variance[0] + merged_variance[1] + internal_variance)
+                size[i + 1] += 1
+                bucket_number -= 1
+                del merged_sum[:2], merged_variance[:2]
+                size[i] -= 2
+            # evict_buckets: delete_element on the tail row
+            while bounded and bucket_number > 1 and (
+                    (max_window is not None and width > max_window) or (max_rows is not None and len(size) > max_rows)):
+                row = len(size) - 1
+                n1 = 1 << row
+                sum0 = row_sum[row][0]
+                width -= n1
+                total -= sum0
+                u1 = sum0 / n1
+                incVariance = row_variance[row][0] + \
+                    n1 * width * (u1 - total / width) * (u1 - total / width) / float(n1 + width)
+                variance = max(variance - incVariance, 0.0)
+                del row_sum[row][0], row_variance[row][0]
+                size[row] -= 1
+                bucket_number -= 1
+                if size[row] == 0:
+                    size.pop()
+                    row_sum.pop()
+                    row_variance.pop()
+            if t < last_clock:
+                mint_time += 1
+                if records is not None and mint_time % min_clock == 0 and width > min_window_length:
+                    index.append(t)
+                    widths.append(width)
+                    totals.append(total)
+                    variances.append(variance)
+                    lengths.append(size[::-1])
+                    bucket_sums.extend(chain.from_iterable(reversed(row_sum)))
+                elif scheduler is not None and width > min_window_length:
+                    # the scheduler sees the detector as check_drift() would show it
+                    self.width, self.sum, self.variance, self.mint_time = width, total, variance, mint_time
+                    if scheduler.due(self):
+                        due = True
+                        stop = t + 1
+                        break
+        return [width, total, variance, bucket_number, mint_time, size, row_sum, row_variance], stop, due
+
+    def _first_cut(self, index, width, total, variance, rows, sums):
+        """
+        The first of the samples recorded by _advance() whose window has a cut, or None.
+
+        The test is the one of the first pass of check_drift() and of
+        cut_expression(), with the same floating-point operations, done on all
+        the recorded windows at once, padded to the same number of buckets.
+        """
+        if not index:
+            return None
+        width = np.array(width)
+        counts = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        lengths = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=counts.sum())
+        # the rows are given from the tail, the tail row holding the largest buckets
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        row = np.repeat(counts - 1, counts) - (np.arange(len(lengths)) - starts)
+        bucket_size = np.repeat(2.0 ** row, lengths)
+        n_buckets = np.add.reduceat(lengths, np.cumsum(counts) - counts)
+        mask = np.arange(n_buckets.max()) < n_buckets[:, None]
+        size0 = np.zeros(mask.shape)
+        size0[mask] = bucket_size
+        sum0 = np.zeros(mask.shape)
+        sum0[mask] = sums
+        # every split point leaves the newest bucket in the recent sub-window
+        mask &= np.arange(mask.shape[1]) < n_buckets[:, None] - 1
+        min_length_of_subwindow = 5
+        n0 = np.add.accumulate(size0, axis=1)
+        u0 = np.add.accumulate(sum0, axis=1)
+        n1 = width[:, None] - n0
+        u1 = np.subtract.accumulate(np.concatenate((np.array(total)[:, None], sum0), axis=1), axis=1)[:, 1:]
+        mask &= (n0 >= min_length_of_subwindow) & (n0 <= width[:, None] - min_length_of_subwindow)
+        # cut_expression()
+        v = (np.array(variance) / width)[:, None]
+        dd = np.array([math.log(2.0 * math.log(n) / self.delta) for n in width.tolist()])[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff = u0 / n0 - u1 / n1
+            m = 1 / (n0 - (min_length_of_subwindow - 1)) + 1 / (n1 - (min_length_of_subwindow - 1))
+            eps = np.sqrt(m * (2 * v) * dd) + 2 / 3 * dd * m
+            cut = mask & (np.abs(diff) > eps)
+        hit = cut.any(axis=1)
+        if not hit.any():
+            return None
+        return index[int(hit.argmax())]
+
     def length(self):
         """Get the length of window"""
         return self.width
 
+    def _stats_callbacks(self, stats):
+        stats.counters.update(merges=0, split_points=0, drifts=0, evictions=0, max_rows=self.bucket_list.count)
+
+        def after_compress(args, merged):
+            if merged:
+                stats.count('merges')
+                stats.peak('max_rows', self.bucket_list.count)
+
+        def after_check(args, change):
+            if change:
+                stats.count('drifts')
+
+        def after_cut(args, cut):
+            stats.count('split_points', len(args[0]))
+
+        def after_evict(args, evicted):
+            stats.count('evictions', evicted)
+
+        return {'compress_buckets': after_compress, 'check_drift': after_check, 'cut_expression': after_cut,
+                'evict_buckets': after_evict}
+
+    def stats(self):
+        """Size of the window and, when enabled, the hot-path counters
+
+        Returns
+        -------
+        stats : dict
+            width, rows and buckets of the window. With the counters enabled,
+            also 'calls' and 'seconds' spent in insert_element, compress_buckets,
+            check_drift (including cut_expression and delete_element),
+            cut_expression and delete_element, the number of bucket merges,
+            of split points tested by the cut expression, of drifts, of buckets
+            evicted by max_window or max_rows, and the largest number of rows.
+        """
+        stats = {'width': self.width, 'rows': self.bucket_list.count, 'buckets': self.bucket_number}
+        if self._stats is not None:
+            stats.update(self._stats.report())
+        return stats
+
+    def to_bytes(self):
+        """Snapshot of the detector state
+
+        Returns
+        -------
+        bytes: a versioned binary layout holding the scalar state followed by the
+        bucket rows in use, see from_bytes(). Only the buckets of the window are
+        written, so detectors in the same state give the same bytes.
+        """
+        size, total, variance = self.bucket_list.rows()
+        rows = len(size)
+        return b''.join((pack_header(self.SNAPSHOT_TAG, self.SNAPSHOT_VERSION),
+                         self._SNAPSHOT.pack(self.delta, self.mint_clock, self.min_clock, self.mint_time,
+                                             self.mdbl_error, self.mdbl_width, self.sum, self.width,
+                                             self.variance, self.min_window_length, self.max_number_of_buckets,
+                                             self.last_bucket_row, self.bucket_number, rows),
+                         self._SNAPSHOT_BOUNDS.pack(self.max_window or 0, self.max_rows or 0),
+                         self._SNAPSHOT_SCHEDULER.pack(*self._scheduler_state()),
+                         array('q', size).tobytes(), array('d', chain.from_iterable(total)).tobytes(),
+                         array('d', chain.from_iterable(variance)).tobytes()))
+
+    def _scheduler_state(self):
+        if self.scheduler is None:
+            return (0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return (self.scheduler.TAG,) + tuple(self.scheduler.state())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Restore a detector from a snapshot written by to_bytes()
+
+        Parameters
+        ----------
+        data : bytes-like object
+
+        Returns
+        -------
+        Adwin: a detector in the same state as the one of the snapshot.
+        """
+        offset = unpack_header(data, cls.SNAPSHOT_TAG, cls.SNAPSHOT_VERSION)
+        (delta, mint_clock, min_clock, mint_time, mdbl_error, mdbl_width, total, width, variance,
+         min_window_length, max_number_of_buckets, last_bucket_row, bucket_number, rows) = \
+            cls._SNAPSHOT.unpack_from(data, offset)
+        offset += cls._SNAPSHOT.size
+        max_window, max_rows = cls._SNAPSHOT_BOUNDS.unpack_from(data, offset)
+        offset += cls._SNAPSHOT_BOUNDS.size
+        state = cls._SNAPSHOT_SCHEDULER.unpack_from(data, offset)
+        offset += cls._SNAPSHOT_SCHEDULER.size
+        scheduler = SCHEDULERS[state[0]].from_state(state[1:]) if state[0] != 0 else None
+        adwin = cls(delta, max_window=max_window or None, max_rows=max_rows or None, scheduler=scheduler)
+        adwin.mint_clock = mint_clock
+        adwin.min_clock = min_clock
+        adwin.mint_time = mint_time
+        adwin.mdbl_error = mdbl_error
+        adwin.mdbl_width = mdbl_width
+        adwin.sum = total
+        adwin.width = width
+        adwin.variance = variance
+        adwin.min_window_length = min_window_length
+        adwin.max_number_of_buckets = max_number_of_buckets
+        adwin.last_bucket_row = last_bucket_row
+        adwin.bucket_number = bucket_number
+        capacity = max(adwin._row_capacity(), 1 << (rows - 1).bit_length())
+        buckets = AdwinBuckets(max_number_of_buckets, capacity=capacity)
+        data = memoryview(data).cast('B')
+        size = array('q', bytes(data[offset:offset + 8 * rows])).tolist()
+        offset += 8 * rows
+        n = 8 * sum(size)
+        total = array('d', bytes(data[offset:offset + n]))
+        variance = array('d', bytes(data[offset + n:offset + 2 * n]))
+        starts = [0]
+        for k in size:
+            starts.append(starts[-1] + k)
+        buckets.set_rows(size, [total[s:e] for s, e in zip(starts, starts[1:])],
+                         [variance[s:e] for s, e in zip(starts, starts[1:])])
+        adwin.bucket_list = buckets
+        return adwin
+
     def insert_element(self, value):
         """insert new bucket"""
         self.width += 1
-        self.bucket_list.head.insert_bucket(float(value), 0.0)
+        self.bucket_list.insert_bucket(0, float(value), 0.0)
         self.bucket_number += 1
         if self.width > 1:
             self.variance += (self.width - 1) * (value - self.sum / (self.width - 1)) \
@@ -95,36 +507,33 @@ class Adwin(object):
         """
         Merge buckets.
         Find the number of buckets in a row, if the row is full, then merge the two buckets.
+
+        Returns
+        -------
+        merged : boolean, true if two buckets were merged.
         """
-        i = 0
-        cont = 0
-        cursor = self.bucket_list.head
-        next_node = None
-        while True:
-            k = cursor.size
-            if k == self.max_number_of_buckets + 1:
-                next_node = cursor.next
-                if next_node is None:
-                    self.bucket_list.add_to_tail()
-                    next_node = cursor.next
+        buckets = self.bucket_list
+        size = buckets.size
+        full = self.max_number_of_buckets + 1
+        for i in range(buckets.count):
+            if size[i] == full:
+                if i == buckets.count - 1:
+                    buckets.add_to_tail()
                     self.last_bucket_row += 1
                 n1 = self.bucket_size(i)
                 n2 = self.bucket_size(i)
-                u1 = cursor.sum[0] / n1
-                u2 = cursor.sum[1] / n2
+                j = i * buckets.columns
+                sum0 = buckets.sum[j]
+                sum1 = buckets.sum[j + 1]
+                u1 = sum0 / n1
+                u2 = sum1 / n2
                 internal_variance = n1 * n2 * (u1 - u2) * (u1 - u2) / (n1 + n2)
-                next_node.insert_bucket(cursor.sum[0] + cursor.sum[1],
-                                        cursor.variance[0] + cursor.variance[1] + internal_variance)
+                buckets.insert_bucket(i + 1, sum0 + sum1,
+                                      buckets.variance[j] + buckets.variance[j + 1] + internal_variance)
                 self.bucket_number -= 1
-                cursor.drop_bucket(2)
-                if next_node.size <= self.max_number_of_buckets:
-                    break
-                else:
-                    break
-            cursor = cursor.next
-            i += 1
-            if cursor is None:
-                break
+                buckets.drop_bucket(i, 2)
+                return True
+        return False
 
     def check_drift(self):
         """
@@ -133,82 +542,108 @@ class Adwin(object):
         Returns
         -------
         change : boolean value
-        Result of whether the window has changed.
+        Result of whether the window has changed. On a change, drift_position is
+        the position in the stream (counting from 0) of the first sample of the
+        new window.
         """
 
         change = False
-        exit = False
-        cursor = None
         self.mint_time += 1
-        if self.mint_time % self.min_clock == 0 and self.width > self.min_window_length:
-            reduce_width = True
-            while reduce_width:
-                reduce_width = False
-                exit = False
-                n0 = 0.0
-                n1 = float(self.width)
-                u0 = 0.0
-                u1 = float(self.sum)
-                cursor = self.bucket_list.tail
-                i = self.last_bucket_row
-                while True:
-                    for k in range(cursor.size):
-                        if i == 0 and k == cursor.size - 1:
-                            exit = True
-                            break
-                        n0 += self.bucket_size(i)
-                        n1 -= self.bucket_size(i)
-                        u0 += cursor.sum[k]
-                        u1 -= cursor.sum[k]
-                        min_length_of_subwindow = 5
-                        if n0 >= min_length_of_subwindow and n1 >= min_length_of_subwindow and self.cut_expression(n0,
-                                                                                                                   n1,
-                                                                                                                   u0,
-                                                                                                                   u1):
-                            reduce_width = True
-                            change = True
-                            if self.width > 0:
-                                self.delete_element()
-                                exit = True
-                                break
-                    cursor = cursor.prev
-                    i -= 1
-                    if exit or cursor is None:
-                        break
+        scheduler = self.scheduler
+        if scheduler is None:
+            due = self.mint_time % self.min_clock == 0
+        else:
+            due = scheduler.due(self)
+        if due and self.width > self.min_window_length:
+            change = self._check_window()
+            if scheduler is not None:
+                scheduler.checked(self, change)
+        return change
+
+    def _check_window(self):
+        """Scan the window for cuts, dropping its oldest buckets while there is one, returns whether it changed"""
+        change = False
+        # every split point leaves the newest bucket in the recent sub-window
+        bucket_size, bucket_sum = self.bucket_list.flatten()
+        bucket_size = bucket_size[:-1]
+        bucket_sum = bucket_sum[:-1]
+        min_length_of_subwindow = 5
+        start = 0
+        while start < len(bucket_size):
+            # a cut drops the oldest bucket, the remaining split points are tested again
+            n0 = np.add.accumulate(bucket_size[start:])
+            u0 = np.add.accumulate(bucket_sum[start:])
+            n1 = float(self.width) - n0
+            u1 = np.subtract.accumulate(np.concatenate(([float(self.sum)], bucket_sum[start:])))[1:]
+            low = n0.searchsorted(min_length_of_subwindow)
+            high = n0.searchsorted(self.width - min_length_of_subwindow, side='right')
+            if low >= high or not self.cut_expression(n0[low:high], n1[low:high],
+                                                      u0[low:high], u1[low:high]).any():
+                break
+            change = True
+            self.delete_element()
+            start += 1
+        if change:
+            # the new window starts after the dropped buckets, however late the check
+            self.drift_position = int(self.mint_time - self.width)
         return change
 
+    def evict_buckets(self):
+        """Drop the oldest buckets while the window is over max_window or max_rows
+
+        Returns
+        -------
+        evicted : int, number of dropped buckets.
+        """
+        evicted = 0
+        while self.bucket_number > 1 and (
+                (self.max_window is not None and self.width > self.max_window) or
+                (self.max_rows is not None and self.bucket_list.count > self.max_rows)):
+            self.delete_element()
+            evicted += 1
+        return evicted
+
+    def _row_capacity(self):
+        """Rows allocated up front, enough for any window within the bounds"""
+        capacity = 8
+        if self.max_window is not None or self.max_rows is not None:
+            # a row of buckets of size 2 ** i needs a window of at least 2 ** i,
+            # and compress_buckets adds one row before the eviction
+            rows = int(self.max_window + 1).bit_length() if self.max_window is not None else self.max_rows
+            if self.max_rows is not None:
+                rows = min(rows, self.max_rows)
+            capacity = rows + 1
+        return capacity
+
     def delete_element(self):
         """delete the bucket at the tail of window"""
-        node = self.bucket_list.tail
-        n1 = self.bucket_size(self.last_bucket_row)
+        buckets = self.bucket_list
+        row = self.last_bucket_row
+        n1 = self.bucket_size(row)
+        sum0 = buckets.sum[row * buckets.columns]
         self.width -= n1
-        self.sum -= node.sum[0]
-        u1 = node.sum[0] / n1
-        incVariance = float(
-            node.variance[0] + n1 * self.width * (u1 - self.sum / self.width) * (u1 - self.sum / self.width)) / (
-                          float(n1 + self.width))
-        self.variance -= incVariance
-        node.drop_bucket()
+        self.sum -= sum0
+        u1 = sum0 / n1
+        incVariance = buckets.variance[row * buckets.columns] + \
+            n1 * self.width * (u1 - self.sum / self.width) * (u1 - self.sum / self.width) / float(n1 + self.width)
+        # the subtraction may leave a rounding error below zero
+        self.variance = max(self.variance - incVariance, 0.0)
+        buckets.drop_bucket(row)
         self.bucket_number -= 1
-        if node.size == 0:
-            self.bucket_list.remove_from_tail()
+        if buckets.size[row] == 0:
+            buckets.remove_from_tail()
             self.last_bucket_row -= 1
 
-    def cut_expression(self, n0_, n1_, u0, u1):
-        """Expression calculation"""
-        n0 = float(n0_)
-        n1 = float(n1_)
+    def cut_expression(self, n0, n1, u0, u1):
+        """Expression calculation, element-wise over the given split points"""
         n = float(self.width)
-        diff = float(u0 / n0) - float(u1 / n1)
+        diff = u0 / n0 - u1 / n1
         v = self.variance / self.width
         dd = math.log(2.0 * math.log(n) / self.delta)
         min_length_of_subwindow = 5
-        m = (float(1 / (n0 - min_length_of_subwindow + 1))) + (float(1 / (n1 - min_length_of_subwindow + 1)))
-        eps = math.sqrt(2 * m * v * dd) + float(2 / 3 * dd * m)
-        if math.fabs(diff) > eps:
-            return True
-        else:
-            return False
+        m = 1 / (n0 - (min_length_of_subwindow - 1)) + 1 / (n1 - (min_length_of_subwindow - 1))
+        eps = np.sqrt(m * (2 * v) * dd) + 2 / 3 * dd * m
+        return np.abs(diff) > eps
 
     def bucket_size(self, Row):
         return int(math.pow(2, Row))
@@ -0,0 +1,308 @@
+"""A bank of independent ADWIN detectors sharing the same arrays."""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import math
+
+import numpy as np
+
+from drift_detector.bank_utils import split_rounds
+
+
+class AdwinBank(object):
+    """Many Adwin detectors, one per stream, kept as a struct of arrays.
+
+    Every stream behaves exactly like a standalone Adwin with the same delta:
+    the bucket rows of all the streams live in ``(n_streams, capacity, buckets)``
+    matrices and each tick updates all the streams it touches with the same
+    vectorized insert, compress and cut steps.
+
+    The dense matrices never grow: a stream whose window needs more than
+    ``capacity`` rows keeps its deeper rows in an overflow store, with one slot
+    per deep stream, which is given back once the window shrinks below
+    ``capacity`` rows again. A stream thus costs about
+    ``capacity * (8 + 16 * (max_number_of_buckets + 1)) + 56`` bytes, 0.9 KB
+    with the default capacity of 8 rows, which hold windows of up to
+    ``max_number_of_buckets * (2 ** capacity - 1)`` elements (1275). The
+    overflow rows cost the same per row, but only for the deep streams, and
+    their ticks are slower since their rows are gathered from and scattered
+    back to both stores. Size capacity from the expected window, about
+    ``log2(window / max_number_of_buckets) + 1`` rows: a larger one wastes
+    memory on every stream, a smaller one sends many streams to the overflow
+    store.
+
+    References
+    ----------
+    A. Bifet, R. Gavalda. (2007). "Learning from Time-Changing
+    Data with Adaptive Windowing". Proceedings of the 2007 SIAM
+    International Conference on Data Mining 443-448.
+    """
+
+    def __init__(self, n_streams, delta=0.01, capacity=8):
+        """Init the buckets of every stream
+
+        Parameters
+        ----------
+        n_streams : int
+            Number of monitored streams, identified by 0 .. n_streams - 1.
+        delta : float
+            confidence value.
+        capacity : int
+            Number of bucket rows kept in the dense matrices for each stream,
+            the deeper rows going to the overflow store.
+        """
+        self.n_streams = n_streams
+        self.delta = delta
+        self.mint_clock = 1.0
+        self.min_window_length = 16
+        self.max_number_of_buckets = 5
+        self.min_clock = self.mint_clock
+        self.mint_time = np.zeros(n_streams)
+        self.sum = np.zeros(n_streams)
+        self.width = np.zeros(n_streams)
+        self.variance = np.zeros(n_streams)
+        self.bucket_number = np.zeros(n_streams, dtype=np.int64)
+        self.row_count = np.ones(n_streams, dtype=np.int64)
+        self.capacity = capacity
+        self.bucket_size = np.zeros((n_streams, capacity), dtype=np.int64)
+        self.bucket_sum = np.zeros((n_streams, capacity, self.max_number_of_buckets + 1))
+        self.bucket_variance = np.zeros((n_streams, capacity, self.max_number_of_buckets + 1))
+        # rows capacity and deeper of the deep streams, in (slots, rows, buckets) matrices
+        self.overflow_slot = np.full(n_streams, -1, dtype=np.int64)
+        self.overflow_size = np.zeros((0, 0), dtype=np.int64)
+        self.overflow_sum = np.zeros((0, 0, self.max_number_of_buckets + 1))
+        self.overflow_variance = np.zeros((0, 0, self.max_number_of_buckets + 1))
+        self._free_slots = []
+        self._column = np.arange(self.max_number_of_buckets + 1)
+
+    def get_estimation(self):
+        """Get the estimation value of every stream"""
+        estimation = np.zeros(self.n_streams)
+        np.divide(self.sum, self.width, out=estimation, where=self.width > 0)
+        return estimation
+
+    def length(self):
+        """Get the length of window of every stream"""
+        return self.width
+
+    def set_input(self, stream_ids, values):
+        """Add one tick of (stream_id, value) pairs and reduce the windows
+
+        A stream may appear several times in the same tick, its values are
+        then added in the given order.
+
+        Parameters
+        ----------
+        stream_ids : array-like of int, shape = [n_pairs]
+        values : array-like of real values, shape = [n_pairs]
+
+        Returns
+        -------
+        drift : array of bool, shape = [n_pairs]
+            True for the pairs whose value made their stream detect a drift.
+        """
+        stream_ids = np.asarray(stream_ids, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        drift = np.zeros(len(stream_ids), dtype=bool)
+        for pairs in split_rounds(stream_ids):
+            ids = stream_ids[pairs]
+            self._insert_element(ids, values[pairs])
+            self._compress_buckets(ids)
+            drift[pairs] = self._check_drift(ids)
+        return drift
+
+    def _insert_element(self, ids, values):
+        width = self.width[ids] + 1
+        total = self.sum[ids]
+        self.width[ids] = width
+        head = self.bucket_size[ids, 0]
+        self.bucket_sum[ids, 0, head] = values
+        self.bucket_variance[ids, 0, head] = 0.0
+        self.bucket_size[ids, 0] = head + 1
+        self.bucket_number[ids] += 1
+        grown = width > 1
+        if grown.any():
+            g = ids[grown]
+            w = width[grown]
+            diff = values[grown] - total[grown] / (w - 1)
+            self.variance[g] += (w - 1) * diff * diff / w
+        self.sum[ids] = total + values
+
+    def _compress_buckets(self, ids):
+        full = self._sizes(ids) == self.max_number_of_buckets + 1
+        merging = full.any(axis=1)
+        if not merging.any():
+            return
+        ids = ids[merging]
+        row = full[merging].argmax(axis=1)
+        new_row = row == self.row_count[ids] - 1
+        if new_row.any():
+            self.row_count[ids[new_row]] += 1
+        self.bucket_number[ids] -= 1
+
+        deep = row + 1 >= self.capacity
+        if deep.any():
+            self._reserve(ids[deep])
+            stored = self._gather(ids[deep])
+            self._merge(*stored, np.arange(deep.sum()), row[deep])
+            self._scatter(ids[deep], *stored)
+            ids, row = ids[~deep], row[~deep]
+        self._merge(self.bucket_size, self.bucket_sum, self.bucket_variance, ids, row)
+
+    def _merge(self, size, total, variance, k, row):
+        """Merge the two oldest buckets of the given rows into the next row, k indexing the first axis of the arrays"""
+        n1 = 2.0 ** row
+        sum0 = total[k, row, 0]
+        sum1 = total[k, row, 1]
+        u1 = sum0 / n1
+        u2 = sum1 / n1
+        internal_variance = n1 * n1 * (u1 - u2) * (u1 - u2) / (n1 + n1)
+        target = size[k, row + 1]
+        total[k, row + 1, target] = sum0 + sum1
+        variance[k, row + 1, target] = variance[k, row, 0] + variance[k, row, 1] + internal_variance
+        size[k, row + 1] = target + 1
+        self._drop_bucket(size, total, variance, k, row, 2)
+
+    def _check_drift(self, ids):
+        change = np.zeros(len(ids), dtype=bool)
+        self.mint_time[ids] += 1
+        checking = (self.mint_time[ids] % self.min_clock == 0) & (self.width[ids] > self.min_window_length)
+        pending = np.flatnonzero(checking)
+        while len(pending) > 0:
+            cut = self._cut(ids[pending])
+            pending = pending[cut]
+            if len(pending) > 0:
+                change[pending] = True
+                self._delete_element(ids[pending])
+        return change
+
+    def _cut(self, ids):
+        """Whether any split point of the window of each stream satisfies the cut expression"""
+        # rows from the tail to the head, up to the deepest window among ids
+        rows = self.row_count[ids].max()
+        if rows > self.capacity:
+            size, bucket_sum, _ = self._gather(ids)
+        else:
+            size, bucket_sum = self.bucket_size[ids], self.bucket_sum[ids]
+        size = size[:, rows - 1::-1]
+        valid = size[:, :, None] > self._column
+        row_bucket_size = 2.0 ** np.arange(rows - 1, -1, -1)
+        bucket_size = np.where(valid, row_bucket_size[:, None], 0.0).reshape(len(ids), -1)
+        bucket_sum = np.where(valid, bucket_sum[:, rows - 1::-1], 0.0).reshape(len(ids), -1)
+        # every split point leaves the newest bucket in the recent sub-window
+        valid[np.arange(len(ids)), rows - 1, size[:, rows - 1] - 1] = False
+        valid = valid.reshape(len(ids), -1)
+
+        width = self.width[ids, None]
+        total = self.sum[ids, None]
+        n0 = np.add.accumulate(bucket_size, axis=1)
+        u0 = np.add.accumulate(bucket_sum, axis=1)
+        n1 = width - n0
+        u1 = np.subtract.accumulate(np.concatenate((total, bucket_sum), axis=1), axis=1)[:, 1:]
+        min_length_of_subwindow = 5
+        valid &= (n0 >= min_length_of_subwindow) & (n1 >= min_length_of_subwindow)
+
+        v = self.variance[ids, None] / width
+        dd = np.array([math.log(2.0 * math.log(n) / self.delta) for n in self.width[ids].tolist()])[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff = u0 / n0 - u1 / n1
+            m = 1 / (n0 - (min_length_of_subwindow - 1)) + 1 / (n1 - (min_length_of_subwindow - 1))
+            eps = np.sqrt(m * (2 * v) * dd) + 2 / 3 * dd * m
+            return (valid & (np.abs(diff) > eps)).any(axis=1)
+
+    def _delete_element(self, ids):
+        row = self.row_count[ids] - 1
+        n1 = 2.0 ** row
+        deep = row >= self.capacity
+        if deep.any():
+            stored = self._gather(ids)
+            k = np.arange(len(ids))
+        else:
+            stored = (self.bucket_size, self.bucket_sum, self.bucket_variance)
+            k = ids
+        size, bucket_sum, bucket_variance = stored
+        sum0 = bucket_sum[k, row, 0]
+        width = self.width[ids] - n1
+        total = self.sum[ids] - sum0
+        u1 = sum0 / n1
+        inc_variance = (bucket_variance[k, row, 0] +
+                        n1 * width * (u1 - total / width) * (u1 - total / width) / (n1 + width))
+        self.width[ids] = width
+        self.sum[ids] = total
+        # the subtraction may leave a rounding error below zero
+        self.variance[ids] = np.maximum(self.variance[ids] - inc_variance, 0.0)
+        self._drop_bucket(size, bucket_sum, bucket_variance, k, row, 1)
+        self.bucket_number[ids] -= 1
+        emptied = size[k, row] == 0
+        if deep.any():
+            self._scatter(ids, *stored)
+        self.row_count[ids[emptied]] -= 1
+        # the overflow rows of these streams are all empty now
+        released = ids[emptied & (row == self.capacity)]
+        if len(released) > 0:
+            self._free_slots.extend(self.overflow_slot[released].tolist())
+            self.overflow_slot[released] = -1
+
+    def _drop_bucket(self, size, total, variance, k, row, n):
+        columns = self.max_number_of_buckets + 1
+        total[k, row, :columns - n] = total[k, row, n:]
+        variance[k, row, :columns - n] = variance[k, row, n:]
+        size[k, row] -= n
+
+    def _sizes(self, ids):
+        """Number of buckets of every row of the given streams, the dense rows then the overflow ones"""
+        size = self.bucket_size[ids]
+        slots = self.overflow_slot[ids]
+        deep = slots >= 0
+        if not deep.any():
+            return size
+        overflow = np.zeros((len(ids), self.overflow_size.shape[1]), dtype=np.int64)
+        overflow[deep] = self.overflow_size[slots[deep]]
+        return np.concatenate((size, overflow), axis=1)
+
+    def _gather(self, ids):
+        """Copy every row of the given streams, the dense rows then the overflow ones, empty for shallow streams"""
+        slots = self.overflow_slot[ids]
+        deep = slots >= 0
+        rows = self.capacity + self.overflow_size.shape[1]
+        size = np.zeros((len(ids), rows), dtype=np.int64)
+        total = np.zeros((len(ids), rows, self.max_number_of_buckets + 1))
+        variance = np.zeros((len(ids), rows, self.max_number_of_buckets + 1))
+        size[:, :self.capacity] = self.bucket_size[ids]
+        total[:, :self.capacity] = self.bucket_sum[ids]
+        variance[:, :self.capacity] = self.bucket_variance[ids]
+        size[deep, self.capacity:] = self.overflow_size[slots[deep]]
+        total[deep, self.capacity:] = self.overflow_sum[slots[deep]]
+        variance[deep, self.capacity:] = self.overflow_variance[slots[deep]]
+        return size, total, variance
+
+    def _scatter(self, ids, size, total, variance):
+        """Write back rows copied by _gather"""
+        slots = self.overflow_slot[ids]
+        deep = slots >= 0
+        self.bucket_size[ids] = size[:, :self.capacity]
+        self.bucket_sum[ids] = total[:, :self.capacity]
+        self.bucket_variance[ids] = variance[:, :self.capacity]
+        self.overflow_size[slots[deep]] = size[deep, self.capacity:]
+        self.overflow_sum[slots[deep]] = total[deep, self.capacity:]
+        self.overflow_variance[slots[deep]] = variance[deep, self.capacity:]
+
+    def _reserve(self, ids):
+        """Give an overflow slot, with enough rows, to every given stream"""
+        missing = ids[self.overflow_slot[ids] < 0]
+        slots, rows = self.overflow_size.shape
+        if len(missing) > len(self._free_slots):
+            slots = max(2 * slots, slots + len(missing) - len(self._free_slots))
+        while self.capacity + rows < self.row_count[ids].max():
+            rows = max(2 * rows, 1)
+        if (slots, rows) != self.overflow_size.shape:
+            self._free_slots.extend(range(slots - 1, self.overflow_size.shape[0] - 1, -1))
+            pad = ((0, slots - self.overflow_size.shape[0]), (0, rows - self.overflow_size.shape[1]))
+            self.overflow_size = np.pad(self.overflow_size, pad)
+            self.overflow_sum = np.pad(self.overflow_sum, pad + ((0, 0),))
+            self.overflow_variance = np.pad(self.overflow_variance, pad + ((0, 0),))
+        for stream in missing.tolist():
+            self.overflow_slot[stream] = self._free_slots.pop()
@@ -0,0 +1,159 @@
+"""Array-backed bucket storage of the adwin exponential histogram"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+from array import array
+
+import numpy as np
+
+# shared by all the instances: the size of the buckets of every row, and the column indices
+_ROW_BUCKET_SIZE = 2.0 ** np.arange(64)
+_COLUMN = np.arange(64)
+
+
+class AdwinBuckets(object):
+    """Bucket rows of an adwin window kept in preallocated flat arrays.
+
+    Row ``i`` holds the buckets of size ``2 ** i``; row 0 is the head (most
+    recent elements) and row ``count - 1`` is the tail (oldest elements).
+    Inside a row, bucket 0 is the oldest one, and the slots past the row
+    size are left stale instead of being cleared. The sums and variances of
+    all the rows live in two contiguous row-major ``array.array`` of
+    ``capacity * columns`` doubles, with ``columns = max_number_of_buckets + 1``,
+    which grow by doubling only when the window needs more rows. Reading or
+    writing one bucket gives plain Python numbers, so the per-sample updates
+    never go through numpy scalars; flatten() reads the same memory through
+    numpy views for the cut scan.
+    """
+
+    def __init__(self, max_number_of_buckets, capacity=8):
+        """Init the bucket arrays with a given parameter max_number_of_buckets
+
+        Parameters
+        ----------
+        max_number_of_buckets : In each row, the max number of buckets
+        capacity : int
+            Number of rows allocated up front.
+        """
+        self.max_number_of_buckets = max_number_of_buckets
+        self.columns = max_number_of_buckets + 1
+        self.sum = array('d', bytes(8 * capacity * self.columns))
+        self.variance = array('d', bytes(8 * capacity * self.columns))
+        self.size = array('q', bytes(8 * capacity))
+        self.count = 1
+        self._views()
+
+    def insert_bucket(self, row, value, variance):
+        """Insert a bucket at the end of a row
+
+        Parameters
+        ----------
+        row : index of the row
+        value: the totally size of the new one
+        variance : the variance of the new one
+        """
+        k = self.size[row]
+        j = row * self.columns + k
+        self.sum[j] = value
+        self.variance[j] = variance
+        self.size[row] = k + 1
+
+    def drop_bucket(self, row, n=1):
+        """Drop the older portion of a row
+
+        Parameters
+        ----------
+        row : index of the row
+        n :number data of drop bucket
+        """
+        k = self.size[row]
+        if k > n:
+            j = row * self.columns
+            self.sum[j:j + k - n] = self.sum[j + n:j + k]
+            self.variance[j:j + k - n] = self.variance[j + n:j + k]
+        self.size[row] = k - n
+
+    def flatten(self):
+        """Get every bucket of the window, from the tail to the head
+
+        Returns
+        -------
+        bucket_size : array of float
+            Number of elements summarized by each bucket, oldest bucket first.
+        bucket_sum : array of float
+            Sum of the elements of each bucket, oldest bucket first.
+        """
+        count = self.count
+        size = self._size_view[count - 1::-1]
+        mask = size[:, None] > _COLUMN[:self.columns]
+        return (np.repeat(_ROW_BUCKET_SIZE[count - 1::-1], size),
+                self._sum_view[:count * self.columns].reshape(count, self.columns)[::-1][mask])
+
+    def add_to_tail(self):
+        """Add an empty row at the tail, growing the arrays if they are full"""
+        if self.count == len(self.size):
+            self._grow()
+        self.count += 1
+
+    def remove_from_tail(self):
+        """Remove the (empty) tail row"""
+        self.count -= 1
+        self.size[self.count] = 0
+        j = self.count * self.columns
+        self.sum[j:j + self.columns] = array('d', bytes(8 * self.columns))
+        self.variance[j:j + self.columns] = array('d', bytes(8 * self.columns))
+
+    def rows(self):
+        """Copy the rows in use to Python lists
+
+        Returns
+        -------
+        size : list of int, number of buckets of each row
+        total : list of lists of float, sums of the buckets of each row, oldest first
+        variance : list of lists of float, variances of the buckets of each row, oldest first
+        """
+        size = self.size[:self.count].tolist()
+        c = self.columns
+        return (size, [self.sum[i * c:i * c + k].tolist() for i, k in enumerate(size)],
+                [self.variance[i * c:i * c + k].tolist() for i, k in enumerate(size)])
+
+    def set_rows(self, size, total, variance):
+        """Replace the rows in use by Python lists, as given by rows()"""
+        count = len(size)
+        while len(self.size) < count:
+            self._grow()
+        c = self.columns
+        for i, k in enumerate(size):
+            self.size[i] = k
+            if k:
+                self.sum[i * c:i * c + k] = array('d', total[i])
+                self.variance[i * c:i * c + k] = array('d', variance[i])
+        # the rows past the tail are empty, like after remove_from_tail()
+        for i in range(count, self.count):
+            self.size[i] = 0
+        self.count = count
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_size_view'], state['_sum_view']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views()
+
+    def _views(self):
+        """numpy views of the sizes and sums, rebuilt whenever the arrays are replaced"""
+        self._size_view = np.frombuffer(self.size, dtype=np.int64)
+        self._sum_view = np.frombuffer(self.sum)
+
+    def _grow(self):
+        # new arrays, as the views keep the old ones from being resized
+        extra = len(self.size)
+        self.sum = self.sum + array('d', bytes(8 * extra * self.columns))
+        self.variance = self.variance + array('d', bytes(8 * extra * self.columns))
+        self.size = self.size + array('q', bytes(8 * extra))
+        self._views()
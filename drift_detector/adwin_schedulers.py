@@ -0,0 +1,132 @@
+"""Schedulers deciding when Adwin runs its cut check"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+# A scheduler has two methods, called by Adwin.check_drift():
+#   due(adwin)              whether the window should be checked after the current sample,
+#   checked(adwin, change)  after every check, with its result.
+# It keeps the state of one detector, so every Adwin needs its own scheduler.
+# state() and from_state() give its parameters and state as five floats, for the snapshots.
+
+
+class EveryK(object):
+    """Check the window every k samples, like Adwin with mint_clock = k"""
+
+    TAG = 1
+
+    def __init__(self, k=1):
+        """
+        Parameters
+        ----------
+        k : int
+            Number of samples between two checks.
+        """
+        self.k = k
+
+    def due(self, adwin):
+        return adwin.mint_time % self.k == 0
+
+    def checked(self, adwin, change):
+        pass
+
+    def state(self):
+        return (self.k, 0.0, 0.0, 0.0, 0.0)
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(int(state[0]))
+
+
+class Geometric(object):
+    """Check the window at geometrically spaced samples
+
+    The gap between two checks starts at start and is multiplied by factor
+    after every check without a change, up to max_gap. It goes back to start
+    after a change, so the window is checked often while it is unstable.
+    """
+
+    TAG = 2
+
+    def __init__(self, start=1, factor=2.0, max_gap=64):
+        """
+        Parameters
+        ----------
+        start : int
+            Gap after a change.
+        factor : float
+            Growth of the gap after every check without a change.
+        max_gap : int
+            Largest gap between two checks.
+        """
+        self.start = start
+        self.factor = factor
+        self.max_gap = max_gap
+        self.gap = float(start)
+        self.next_check = 0.0
+
+    def due(self, adwin):
+        return adwin.mint_time >= self.next_check
+
+    def checked(self, adwin, change):
+        self.gap = float(self.start) if change else min(self.gap * self.factor, self.max_gap)
+        self.next_check = adwin.mint_time + round(self.gap)
+
+    def state(self):
+        return (self.start, self.factor, self.max_gap, self.gap, self.next_check)
+
+    @classmethod
+    def from_state(cls, state):
+        scheduler = cls(int(state[0]), state[1], int(state[2]))
+        scheduler.gap = state[3]
+        scheduler.next_check = state[4]
+        return scheduler
+
+
+class EstimateMoved(object):
+    """Check the window when its estimation moved by more than threshold since the last check
+
+    A change of the mean of the recent samples moves the estimation of the
+    whole window, the smaller the recent part the smaller the move; max_gap
+    bounds the number of samples between two checks anyway.
+    """
+
+    TAG = 3
+
+    def __init__(self, threshold=0.01, max_gap=256):
+        """
+        Parameters
+        ----------
+        threshold : float
+            Move of the estimation triggering a check.
+        max_gap : int
+            Largest number of samples between two checks.
+        """
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.reference = None
+        self.last_check = 0.0
+
+    def due(self, adwin):
+        return (self.reference is None or adwin.mint_time - self.last_check >= self.max_gap or
+                abs(adwin.sum / adwin.width - self.reference) > self.threshold)
+
+    def checked(self, adwin, change):
+        self.reference = adwin.sum / adwin.width if adwin.width > 0 else None
+        self.last_check = adwin.mint_time
+
+    def state(self):
+        return (self.threshold, self.max_gap, float('nan') if self.reference is None else self.reference,
+                self.last_check, 0.0)
+
+    @classmethod
+    def from_state(cls, state):
+        scheduler = cls(state[0], int(state[1]))
+        scheduler.reference = None if state[2] != state[2] else state[2]
+        scheduler.last_check = state[3]
+        return scheduler
+
+
+SCHEDULERS = dict((cls.TAG, cls) for cls in (EveryK, Geometric, EstimateMoved))
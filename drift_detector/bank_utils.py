@@ -0,0 +1,36 @@
+"""Helpers shared by the multi-stream detector banks"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import numpy as np
+
+
+def split_rounds(stream_ids):
+    """Split one tick of (stream_id, value) pairs into rounds of distinct streams
+
+    The k-th round holds the k-th pair of every stream, so applying the rounds
+    one after the other adds the values of each stream in the given order.
+
+    Parameters
+    ----------
+    stream_ids : array of int, shape = [n_pairs]
+
+    Returns
+    -------
+    rounds : list of arrays of int
+        Positions in stream_ids of the pairs of each round.
+    """
+    if len(stream_ids) == 0:
+        return []
+    order = np.argsort(stream_ids, kind='stable')
+    sorted_ids = stream_ids[order]
+    first = np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - group_start
+    if first.all():
+        return [np.arange(len(order))]
+    return [np.flatnonzero(rank == r) for r in range(rank.max() + 1)]
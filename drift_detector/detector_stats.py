@@ -0,0 +1,148 @@
+"""Opt-in hot-path counters of the detectors"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import copy
+from time import perf_counter_ns
+
+
+class DetectorStats(object):
+    """Call counts and running times of the methods of a detector.
+
+    The counting is done by wrappers stored as instance attributes, which
+    shadow the methods of the class. A detector without wrappers runs its
+    plain methods, so the counters cost nothing until they are enabled.
+    Running times of methods calling each other are nested, not exclusive.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.nanoseconds = {}
+        self.counters = {}
+        self._wrapped = []
+
+    def wrap(self, owner, name, key=None, after=None):
+        """Count and time the calls to owner.name
+
+        Parameters
+        ----------
+        owner : object whose method is wrapped
+        name : str
+            Name of the method.
+        key : str, optional
+            Name of the counter, name by default.
+        after : callable, optional
+            after(args, result) is called after every call, to update other counters.
+        """
+        key = key or name
+        method = getattr(owner, name)
+        calls = self.calls
+        nanoseconds = self.nanoseconds
+        calls[key] = 0
+        nanoseconds[key] = 0
+
+        def wrapper(*args):
+            start = perf_counter_ns()
+            result = method(*args)
+            nanoseconds[key] += perf_counter_ns() - start
+            calls[key] += 1
+            if after is not None:
+                after(args, result)
+            return result
+        setattr(owner, name, wrapper)
+        self._wrapped.append((owner, name))
+
+    def plain_state(self, owner):
+        """A copy of the __dict__ of owner without the wrappers, which are closures and do not pickle"""
+        state = owner.__dict__.copy()
+        for wrapped, name in self._wrapped:
+            if wrapped is owner:
+                state.pop(name, None)
+        return state
+
+    def count(self, key, n=1):
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def peak(self, key, value):
+        if value > self.counters.get(key, value - 1):
+            self.counters[key] = value
+
+    def unwrap(self):
+        """Remove the wrappers, the owners run their plain methods again"""
+        for owner, name in self._wrapped:
+            owner.__dict__.pop(name, None)
+        self._wrapped = []
+
+    def report(self):
+        """calls and seconds per wrapped method, followed by the other counters"""
+        report = {'calls': dict(self.calls),
+                  'seconds': dict((k, v * 1e-9) for k, v in self.nanoseconds.items())}
+        report.update(self.counters)
+        return report
+
+
+class StatsMixin(object):
+    """enable_stats() and pickling for a detector counting its hot-path operations.
+
+    The counted methods are listed in _STATS_METHODS, as method names or as
+    (name, key, part) tuples: the counter key defaults to the method name,
+    and part names the attribute owning the method, the detector itself by
+    default. A detector
+    sets its own counters and returns the callbacks run after its methods
+    in _stats_callbacks(). The wrappers do not pickle: a detector is pickled
+    without them and its counters restart from zero once unpickled.
+    """
+
+    _STATS_METHODS = ()
+
+    def enable_stats(self, enabled=True):
+        """Start, or stop, counting the hot-path operations
+
+        The counters restart from zero. While they are disabled, the detector
+        runs its plain methods and the counting costs nothing.
+
+        Parameters
+        ----------
+        enabled : bool
+        """
+        if self._stats is not None:
+            self._stats.unwrap()
+            self._stats = None
+        if enabled:
+            stats = DetectorStats()
+            after = self._stats_callbacks(stats)
+            for name, key, part in self._stats_methods():
+                owner = self if part is None else getattr(self, part)
+                stats.wrap(owner, name, key=key, after=after.get(key or name))
+            self._stats = stats
+
+    def _stats_methods(self):
+        for method in self._STATS_METHODS:
+            if isinstance(method, str):
+                method = (method,)
+            yield (method + (None, None))[:3]
+
+    def _stats_callbacks(self, stats):
+        """Set the initial counters, returns the after callbacks of the counters keys"""
+        return {}
+
+    def __getstate__(self):
+        if self._stats is None:
+            return self.__dict__.copy()
+        state = self._stats.plain_state(self)
+        for part in set(part for _, _, part in self._stats_methods() if part is not None):
+            clone = copy.copy(state[part])
+            clone.__dict__ = self._stats.plain_state(state[part])
+            state[part] = clone
+        state['_stats'] = True
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        enabled = self._stats is not None
+        self._stats = None
+        if enabled:
+            self.enable_stats()
@@ -0,0 +1,109 @@
+"""Helpers of the binary snapshots written by the to_bytes() methods of the detectors"""
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import struct
+
+import numpy as np
+
+# every snapshot starts with a 2-byte tag naming its class and a format version
+HEADER = struct.Struct('<2sB')
+LENGTH = struct.Struct('<I')
+RNG_STATE = struct.Struct('<16s16sBI')
+
+
+def pack_header(tag, version):
+    return HEADER.pack(tag, version)
+
+
+def unpack_header(data, tag, version):
+    """Check the header of a snapshot, returns the offset of its body
+
+    Raises
+    ------
+    ValueError
+        If the snapshot is not one of the given class, or not of its current format.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated snapshot")
+    found_tag, found_version = HEADER.unpack_from(data, 0)
+    if found_tag != tag:
+        raise ValueError("Expected a %r snapshot, got %r" % (tag, found_tag))
+    if found_version != version:
+        raise ValueError("Unsupported snapshot version %d of %r" % (found_version, tag))
+    return HEADER.size
+
+
+def pack_blob(blob):
+    """A length-prefixed nested snapshot"""
+    return LENGTH.pack(len(blob)) + blob
+
+
+def unpack_blob(data, offset):
+    """Read a nested snapshot, returns (blob, offset after it)"""
+    n, = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    return bytes(data[offset:offset + n]), offset + n
+
+
+def pack_values(values):
+    """A length-prefixed list of numbers, stored as int64 when they are all integral
+
+    The buffer and reservoir of the volatility detector hold integer intervals in lists
+    of Python numbers, keeping them as integers keeps their running totals exact.
+    """
+    array = np.asarray(values, dtype=float)
+    integral = np.all(np.floor(array) == array) and np.all(np.abs(array) < 2.0 ** 63)
+    if integral:
+        array = np.asarray([int(v) for v in values], dtype=np.int64)
+    return LENGTH.pack(len(array)) + (b'q' if integral else b'd') + array.tobytes()
+
+
+def unpack_values(data, offset):
+    """Read a list of numbers written by pack_values(), returns (list, offset after it)"""
+    n, = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    dtype = np.int64 if data[offset:offset + 1] == b'q' else np.float64
+    offset += 1
+    values = np.frombuffer(data, dtype=dtype, count=n, offset=offset).tolist()
+    return values, offset + 8 * n
+
+
+def pack_rng(state):
+    """A numpy Generator state (bit_generator.state) of a PCG64, the default, or PCG64DXSM bit generator"""
+    name = state['bit_generator']
+    if name not in ('PCG64', 'PCG64DXSM'):
+        raise ValueError("Cannot snapshot a %s random generator" % name)
+    name = name.encode('ascii')
+    return (struct.pack('<B', len(name)) + name +
+            RNG_STATE.pack(state['state']['state'].to_bytes(16, 'little'),
+                           state['state']['inc'].to_bytes(16, 'little'),
+                           state['has_uint32'], state['uinteger']))
+
+
+def unpack_rng(data, offset):
+    """Read a random generator written by pack_rng(), returns (generator, offset after it)"""
+    n = data[offset]
+    name = bytes(data[offset + 1:offset + 1 + n]).decode('ascii')
+    offset += 1 + n
+    value, inc, has_uint32, uinteger = RNG_STATE.unpack_from(data, offset)
+    bit_generator = getattr(np.random, name)()
+    bit_generator.state = {'bit_generator': name,
+                           'state': {'state': int.from_bytes(value, 'little'),
+                                     'inc': int.from_bytes(inc, 'little')},
+                           'has_uint32': has_uint32, 'uinteger': uinteger}
+    return np.random.Generator(bit_generator), offset + RNG_STATE.size
+
+
+def detector_from_bytes(data):
+    """Restore a detector from a snapshot of any of the detector classes"""
+    from drift_detector.adwin import Adwin
+    from drift_detector.DDM import DDM
+    from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
+    for cls in (Adwin, DDM, VolatilityDetector):
+        if bytes(data[:2]) == cls.SNAPSHOT_TAG:
+            return cls.from_bytes(data)
+    raise ValueError("Unknown snapshot tag %r" % bytes(data[:2]))
@@ -6,23 +6,20 @@
 # License: BSD 3 clause
 
 import math
-import numpy as np
+import struct
 
-
-def calculate_stddev(times, mean):
-    count = 0
-    sum = 0
-    for d in times:
-        if d > 0:
-            count += 1
-            sum += math.pow(d - mean, 2)
-    if count == 0:
-        return 0
-    else:
-        return math.sqrt(sum / count)
+from drift_detector.snapshot import pack_header, unpack_header, pack_values, unpack_values
 
 
 class Buffer:
+    """Fixed-size ring buffer keeping the running sum and sum of squares of its values,
+    so that adding a value and computing the mean or the standard deviation take
+    constant time."""
+
+    SNAPSHOT_TAG = b'BU'
+    SNAPSHOT_VERSION = 1
+    _SNAPSHOT = struct.Struct('<qq?')
+
     def __init__(self, size):
         """Initialize the buffer with the given size
 
@@ -31,13 +28,12 @@ class Buffer:
         size : int
             Size of the buffer, the buffer is initialized with zeros.
         """
-        self.buffer = []
+        self.buffer = [0.0] * size
         self.size = size
         self.sliding_index = 0
         self.is_full = False
         self.total = 0
-        for i in range(self.size):
-            self.buffer.append(0.0)
+        self.total_squares = 0
 
     def add(self, value):
         """Add an element into the buffer
@@ -52,45 +48,62 @@ class Buffer:
         -------
         removed: if the buffer is full, else return -1.
         """
+        removed = -1
+        if self.is_full:
+            removed = self.buffer[self.sliding_index]
+            self.total -= removed
+            self.total_squares -= removed * removed
+        self.buffer[self.sliding_index] = value
+        self.total += value
+        self.total_squares += value * value
+        self.sliding_index += 1
         if self.sliding_index == self.size:
-            self.is_full = True
             self.sliding_index = 0
-            self.buffer[:] = []
-            for i in range(self.size):
-                self.buffer.append(0.0)
-
-        removed = self.buffer[self.sliding_index]
-        self.total -= removed
-
-        self.buffer.append(value)
-        self.sliding_index += 1
-        self.total += value
+            self.is_full = True
+        return removed
 
+    def get_count(self):
+        """Get the number of elements in the buffer"""
         if self.is_full:
-            return removed
+            return self.size
         else:
-            return -1
+            return self.sliding_index
 
     def get_mean(self):
         """Calculate the mean value of the buffer"""
-        if self.is_full:
-            return self.total / self.size
-        else:
-            return self.total / self.sliding_index
+        return self.total / self.get_count()
 
     def get_stddev(self):
         """Calculate the standard deviation"""
-        stddev = calculate_stddev(self.buffer, self.get_mean())
-        if stddev == 0:
+        count = self.get_count()
+        mean = self.total / count
+        variance = self.total_squares / count - mean * mean
+        if variance <= 0:
             return 0.00000000001
         else:
-            return stddev
+            return math.sqrt(variance)
 
     def clear(self):
         """Clear the buffer, reset the parameters"""
-        self.buffer[:] = []
-        for i in range(self.size):
-            self.buffer.append(0.0)
+        self.buffer = [0.0] * self.size
         self.sliding_index = 0
         self.is_full = False
         self.total = 0
+        self.total_squares = 0
+
+    def to_bytes(self):
+        """Snapshot of the buffer, see from_bytes()"""
+        return b''.join((pack_header(self.SNAPSHOT_TAG, self.SNAPSHOT_VERSION),
+                         self._SNAPSHOT.pack(self.size, self.sliding_index, self.is_full),
+                         pack_values([self.total, self.total_squares]), pack_values(self.buffer)))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Restore a buffer from a snapshot written by to_bytes()"""
+        offset = unpack_header(data, cls.SNAPSHOT_TAG, cls.SNAPSHOT_VERSION)
+        buffer = cls.__new__(cls)
+        buffer.size, buffer.sliding_index, buffer.is_full = cls._SNAPSHOT.unpack_from(data, offset)
+        offset += cls._SNAPSHOT.size
+        (buffer.total, buffer.total_squares), offset = unpack_values(data, offset)
+        buffer.buffer, offset = unpack_values(data, offset)
+        return buffer
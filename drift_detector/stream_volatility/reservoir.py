@@ -5,12 +5,20 @@
 #          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
 # License: BSD 3 clause
 
+import math
+import struct
+
 import numpy as np
-from buffer import calculate_stddev
+
+from drift_detector.snapshot import pack_header, unpack_header, pack_values, unpack_values, pack_rng, unpack_rng
 
 
 class Reservoir:
-    def __init__(self, size):
+    SNAPSHOT_TAG = b'RE'
+    SNAPSHOT_VERSION = 1
+    _SNAPSHOT = struct.Struct('<qqqq')
+
+    def __init__(self, size, seed=None, block_size=256):
         """Initialize the reservoir with a given size.
 
         Parameters
@@ -18,14 +26,21 @@ class Reservoir:
         size : int
             Size of the reservoir, the reservoir is initialized with zeros. The number of elements of the
             reservoir equals to this size.
+        seed : None, int or numpy.random.Generator
+            Seed of the random generator owned by the reservoir, which picks the replaced elements.
+        block_size : int
+            Number of replacement indices drawn at once from the random generator.
         """
         self.size = size
-        self.elements = []
+        self.elements = [0.0] * size
         self.element_total = 0
+        self.element_squares = 0
         self.e_index = 0
-        self.rand = np.random
-        for i in range(self.size):
-            self.elements.append(0.0)
+        self.rand = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.replacements = []
+        self.replacement_index = 0
+        self.replacements_state = None
 
     def add_element(self, input_value):
         """Add an element to the reservoir. As the sliding window slides, the oldest entry in the
@@ -41,13 +56,21 @@ class Reservoir:
         """
         if self.e_index < self.size:
             self.elements[self.e_index] = input_value
-            self.element_total += input_value
             self.e_index += 1
         else:
-            index_remove = int(self.rand.rand() * self.e_index)
-            self.element_total -= self.elements[index_remove]
+            if self.replacement_index == len(self.replacements):
+                # the state the block is drawn from, which is all a snapshot needs to draw it again
+                self.replacements_state = self.rand.bit_generator.state
+                self.replacements = self.rand.integers(0, self.size, self.block_size).tolist()
+                self.replacement_index = 0
+            index_remove = self.replacements[self.replacement_index]
+            self.replacement_index += 1
+            removed = self.elements[index_remove]
+            self.element_total -= removed
+            self.element_squares -= removed * removed
             self.elements[index_remove] = input_value
-            self.element_total += input_value
+        self.element_total += input_value
+        self.element_squares += input_value * input_value
 
     def get_reservoir_mean(self):
         """Calculate the mean of the elements stored in reservoir"""
@@ -55,11 +78,12 @@ class Reservoir:
 
     def get_stddev(self):
         """Calculate the standard deviation of the elements stored in reservoir"""
-        stddev = calculate_stddev(self.elements, self.get_reservoir_mean())
-        if stddev == 0:
+        mean = self.get_reservoir_mean()
+        variance = self.element_squares / self.e_index - mean * mean
+        if variance <= 0:
             return 0.00000000001
         else:
-            return stddev
+            return math.sqrt(variance)
 
     def get_count(self):
         """Get the number of elements in the reservoir, this statistics is monitored by e_index"""
@@ -72,11 +96,44 @@ class Reservoir:
             return False
 
     def clear(self):
-        self.elements[:] = []
-        for i in range(self.size):
-            self.elements.append(0.0)
+        self.elements = [0.0] * self.size
         self.element_total = 0
+        self.element_squares = 0
         self.e_index = 0
 
     def check_is_clear(self):
         return self.e_index == 0
+
+    def to_bytes(self):
+        """Snapshot of the reservoir, including the state of its random generator, see from_bytes()
+
+        While a block of replacement indices is in use, the snapshot holds the
+        generator state the block was drawn from and the position in the block.
+        """
+        if self.replacement_index < len(self.replacements):
+            state, index = self.replacements_state, self.replacement_index
+        else:
+            state, index = self.rand.bit_generator.state, -1
+        return b''.join((pack_header(self.SNAPSHOT_TAG, self.SNAPSHOT_VERSION),
+                         self._SNAPSHOT.pack(self.size, self.e_index, self.block_size, index),
+                         pack_values([self.element_total, self.element_squares]), pack_values(self.elements),
+                         pack_rng(state)))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Restore a reservoir from a snapshot written by to_bytes()"""
+        offset = unpack_header(data, cls.SNAPSHOT_TAG, cls.SNAPSHOT_VERSION)
+        reservoir = cls.__new__(cls)
+        reservoir.size, reservoir.e_index, reservoir.block_size, index = cls._SNAPSHOT.unpack_from(data, offset)
+        offset += cls._SNAPSHOT.size
+        (reservoir.element_total, reservoir.element_squares), offset = unpack_values(data, offset)
+        reservoir.elements, offset = unpack_values(data, offset)
+        reservoir.rand, offset = unpack_rng(data, offset)
+        reservoir.replacements = []
+        reservoir.replacement_index = 0
+        reservoir.replacements_state = None
+        if index >= 0:
+            reservoir.replacements_state = reservoir.rand.bit_generator.state
+            reservoir.replacements = reservoir.rand.integers(0, reservoir.size, reservoir.block_size).tolist()
+            reservoir.replacement_index = index
+        return reservoir
@@ -6,11 +6,18 @@
 #          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
 # License: BSD 3 clause
 
+import struct
+
+import numpy as np
+
+from drift_detector.detector_stats import StatsMixin
+from drift_detector.snapshot import (pack_header, unpack_header, pack_values, unpack_values, pack_blob, unpack_blob,
+                                     detector_from_bytes)
 from drift_detector.stream_volatility.buffer import Buffer
 from drift_detector.stream_volatility.reservoir import Reservoir
 
 
-class VolatilityDetector:
+class VolatilityDetector(StatsMixin):
     """
     A drift detector is a detector that monitors the changes of stream volatility.
     Stream Volatility is the rate of changes of the detected changes given by a drift detector like Adwin.
@@ -30,7 +37,13 @@ class VolatilityDetector:
     In: 2014 IEEE International Conference on Data Mining (ICDM), pp. 863–868 (2014)
 
     """
-    def __init__(self, drift_detector, size):
+    SNAPSHOT_TAG = b'VD'
+    SNAPSHOT_VERSION = 1
+    _SNAPSHOT = struct.Struct('<qdqqq??')
+    _STATS_METHODS = ('set_input', 'set_input_many', ('_add_drift', 'drifts'), ('clear', 'volatility_shifts', 'buffer'),
+                      ('add_element', 'reservoir_add_element', 'reservoir'))
+
+    def __init__(self, drift_detector, size, seed=None, collect_stats=False):
         """
         Initialize a drift detector
 
@@ -41,10 +54,14 @@ class VolatilityDetector:
                     The corresponding drift detector is passed here to monitor its outputs.
         size: int
             Size of the reservoir and buffer by default.
+        seed: None, int or numpy.random.Generator
+            Seed of the random generator of the reservoir.
+        collect_stats: bool
+            Count the hot-path operations from the start, see enable_stats().
         """
         self.drift_detector = drift_detector
         self.sample = 0
-        self.reservoir = Reservoir(size)
+        self.reservoir = Reservoir(size, seed=seed)
         self.buffer = Buffer(size)
         self.confidence = 0.05
         self.recent_interval = []
@@ -55,6 +72,9 @@ class VolatilityDetector:
         self.rolling_index = 0
         for i in range(size * 2 + 1):
             self.recent_interval.append(0.0)
+        self._stats = None
+        if collect_stats:
+            self.enable_stats()
 
     def set_input(self, input_value):
         """
@@ -73,29 +93,273 @@ class VolatilityDetector:
         self.sample += 1
         self.drift_found = self.drift_detector.set_input(input_value)
         if self.drift_found:
-            self.timestamp += 1
-            if self.buffer.is_full:
-                result_buffer = self.buffer.add(self.timestamp)
-                self.reservoir.add_element(result_buffer)
-            else:
-                self.buffer.add(self.timestamp)
-            interval = self.timestamp
-            self.recent_interval[self.rolling_index] = interval
-            self.rolling_index += 1
-            if self.rolling_index == self.reservoir.size * 2:
-                self.rolling_index = 0
-            self.timestamp = 0
-            self.pre_drift_point = self.sample
-            if self.buffer.is_full and self.reservoir.check_full():
-                relative_var = self.buffer.get_stddev() / self.reservoir.get_stddev()
-                if relative_var > (1.0 + self.confidence) or relative_var < (1.0 - self.confidence):
-                    self.buffer.clear()
-                    # self.severity_buffer[:] = []
-                    self.vol_drift_found = True
-                else:
-                    self.vol_drift_found = False
+            self._add_drift()
         else:
             self.timestamp += 1
             self.vol_drift_found = False
 
         return self.vol_drift_found
+
+    def set_input_many(self, input_values):
+        """
+        Add a sequence of input values, one after the other.
+
+        The values go to the drift detector in one batch when it has a set_input_many() method;
+        the buffer and the reservoir are then only touched at the detected drifts, which gives
+        the same results as repeated calls to set_input().
+
+        Parameters
+        ----------
+        input_values: array-like of real values
+
+        Returns
+        -------
+        vol_drift_index : array of int
+            Positions in input_values where a drift of stream volatility was found.
+        drift_index : array of int
+            Positions in input_values where the drift detector found a drift.
+        """
+        input_values = np.asarray(input_values, dtype=float)
+        if hasattr(self.drift_detector, 'set_input_many'):
+            drift_index = self.drift_detector.set_input_many(input_values)[0]
+        else:
+            drift_index = np.flatnonzero([self.drift_detector.set_input(v) for v in input_values.tolist()])
+        vol_drift_index = []
+        previous = -1
+        for i in drift_index.tolist():
+            # the samples between two drifts only move the clocks forward
+            self.sample += i - previous
+            self.timestamp += i - previous - 1
+            if i - previous > 1:
+                self.vol_drift_found = False
+            if self._add_drift():
+                vol_drift_index.append(i)
+            previous = i
+        remaining = len(input_values) - 1 - previous
+        if remaining > 0:
+            self.sample += remaining
+            self.timestamp += remaining
+            self.vol_drift_found = False
+        if len(input_values) > 0:
+            self.drift_found = remaining == 0
+        return np.array(vol_drift_index, dtype=int), drift_index
+
+    def enable_stats(self, enabled=True):
+        """
+        Start, or stop, counting the hot-path operations, of this detector and of its drift detector.
+
+        See StatsMixin.enable_stats().
+        """
+        if hasattr(self.drift_detector, 'enable_stats'):
+            self.drift_detector.enable_stats(enabled)
+        super().enable_stats(enabled)
+
+    def stats(self):
+        """
+        Sizes and, when enabled, the hot-path counters.
+
+        Returns
+        -------
+        stats : dict
+            samples seen, buffer and reservoir counts, and the stats of the drift
+            detector when it has some. With the counters enabled, also 'calls' and
+            'seconds' of set_input, set_input_many, the drifts of the drift detector
+            (buffer and reservoir updates), the volatility shifts and the
+            reservoir replacements.
+        """
+        stats = {'samples': self.sample, 'buffer': self.buffer.get_count(), 'reservoir': self.reservoir.get_count()}
+        if hasattr(self.drift_detector, 'stats'):
+            stats['drift_detector'] = self.drift_detector.stats()
+        if self._stats is not None:
+            stats.update(self._stats.report())
+        return stats
+
+    def to_bytes(self):
+        """
+        Snapshot of the detector state.
+
+        Returns
+        -------
+        bytes: a versioned binary layout of the counters, followed by the snapshots of the
+        drift detector, the buffer and the reservoir (with its random generator), see from_bytes().
+        """
+        return b''.join((pack_header(self.SNAPSHOT_TAG, self.SNAPSHOT_VERSION),
+                         self._SNAPSHOT.pack(self.sample, self.confidence, self.timestamp, self.pre_drift_point,
+                                             self.rolling_index, self.vol_drift_found, self.drift_found),
+                         pack_values(self.recent_interval), pack_blob(self.drift_detector.to_bytes()),
+                         pack_blob(self.buffer.to_bytes()), pack_blob(self.reservoir.to_bytes())))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Restore a detector from a snapshot written by to_bytes().
+
+        Parameters
+        ----------
+        data : bytes-like object
+
+        Returns
+        -------
+        VolatilityDetector: a detector in the same state as the one of the snapshot.
+        """
+        offset = unpack_header(data, cls.SNAPSHOT_TAG, cls.SNAPSHOT_VERSION)
+        detector = cls.__new__(cls)
+        (detector.sample, detector.confidence, detector.timestamp, detector.pre_drift_point, detector.rolling_index,
+         detector.vol_drift_found, detector.drift_found) = cls._SNAPSHOT.unpack_from(data, offset)
+        offset += cls._SNAPSHOT.size
+        detector.recent_interval, offset = unpack_values(data, offset)
+        blob, offset = unpack_blob(data, offset)
+        detector.drift_detector = detector_from_bytes(blob)
+        blob, offset = unpack_blob(data, offset)
+        detector.buffer = Buffer.from_bytes(blob)
+        blob, offset = unpack_blob(data, offset)
+        detector.reservoir = Reservoir.from_bytes(blob)
+        detector._stats = None
+        return detector
+
+    def _add_drift(self):
+        """Record a drift found by the drift detector, returns whether the stream volatility changed"""
+        self.timestamp += 1
+        if self.buffer.is_full:
+            result_buffer = self.buffer.add(self.timestamp)
+            self.reservoir.add_element(result_buffer)
+        else:
+            self.buffer.add(self.timestamp)
+        interval = self.timestamp
+        self.recent_interval[self.rolling_index] = interval
+        self.rolling_index += 1
+        if self.rolling_index == self.reservoir.size * 2:
+            self.rolling_index = 0
+        self.timestamp = 0
+        self.pre_drift_point = self.sample
+        if self.buffer.is_full and self.reservoir.check_full():
+            relative_var = self.buffer.get_stddev() / self.reservoir.get_stddev()
+            if relative_var > (1.0 + self.confidence) or relative_var < (1.0 - self.confidence):
+                self.buffer.clear()
+                # self.severity_buffer[:] = []
+                self.vol_drift_found = True
+            else:
+                self.vol_drift_found = False
+        return self.vol_drift_found
+
+
+def _stddev(total, squares, count):
+    """Standard deviations from running sums, like Buffer.get_stddev() and Reservoir.get_stddev()"""
+    mean = total / count
+    variance = squares / count - mean * mean
+    return np.where(variance <= 0, 0.00000000001, np.sqrt(np.maximum(variance, 0)))
+
+
+def volatility_shifts(drifts, size, seed=None, confidence=0.05, block_size=256):
+    """
+    Offline volatility detection over the drifts already found in a stream.
+
+    Gives the volatility shifts a new VolatilityDetector(drift_detector, size, seed)
+    finds when its drift detector reports these drifts, without replaying the
+    samples: the intervals between drifts go through the buffer and the reservoir
+    with array operations, a few chunks of intervals at a time, so the cost grows
+    with the number of drifts and not with the length of the stream. The reservoir
+    draws its replacements from the same random generator as Reservoir(size, seed, block_size).
+
+    Parameters
+    ----------
+    drifts : array of int or array of bool
+        Positions of the drifts in the stream, in increasing order, or a mask of the
+        samples where the drift detector found a drift.
+    size : int
+        Size of the reservoir and buffer.
+    seed : None, int or numpy.random.Generator
+        Seed of the random generator of the reservoir.
+    confidence : float
+        Largest deviation of the relative volatility from 1 without a shift.
+    block_size : int
+        Number of replacement indices drawn at once from the random generator.
+
+    Returns
+    -------
+    vol_drift_index : array of int
+        Positions in the stream where a drift of stream volatility was found.
+    drift_index : array of int
+        Positions of the drifts.
+    intervals : array of int
+        Number of samples from the previous drift (or the start of the stream) to every drift.
+    relative_var : array of float
+        Ratio of the standard deviations of the buffer and the reservoir at every drift,
+        nan where they were not compared.
+    """
+    drifts = np.asarray(drifts)
+    drift_index = np.flatnonzero(drifts) if drifts.dtype == bool else drifts.astype(np.int64)
+    intervals = np.diff(np.r_[-1, drift_index])
+    n = len(intervals)
+    relative_var = np.full(n, np.nan)
+    # sums over the buffer windows come from prefix sums of the intervals
+    totals = np.r_[0, np.cumsum(intervals)]
+    squares = np.r_[0, np.cumsum(intervals * intervals)]
+
+    rand = np.random.default_rng(seed)
+    replacements = np.empty(0, dtype=np.int64)
+    elements = np.zeros(size, dtype=np.int64)
+    count, element_total, element_squares = 0, 0, 0
+    vol_drift = []
+    # the buffer was cleared before interval start, it is full from start + size - 1 on
+    start = 0
+    j = size - 1
+    chunk = size
+    while j < n:
+        end = min(n, j + chunk)
+        # every interval after the first size ones of the buffer pushes one out, into the reservoir
+        first_write = max(j, start + size)
+        values = intervals[first_write - size:end - size]
+        m = len(values)
+        fills = min(m, size - count)
+        needed = m - fills
+        while len(replacements) < needed:
+            replacements = np.r_[replacements, rand.integers(0, size, block_size)]
+        slots = np.r_[np.arange(count, count + fills), replacements[:needed]]
+        # every write replaces the previous write to its slot, or the element held before the chunk
+        order = np.argsort(slots, kind='stable')
+        sorted_slots = slots[order]
+        first = np.diff(sorted_slots, prepend=-1) != 0
+        removed_sorted = values[order]
+        removed_sorted = np.r_[removed_sorted[:1], removed_sorted[:-1]]
+        removed_sorted[first] = elements[sorted_slots[first]]
+        removed = np.empty_like(values)
+        removed[order] = removed_sorted
+        res_total = np.r_[element_total, element_total + np.cumsum(values - removed)]
+        res_squares = np.r_[element_squares, element_squares + np.cumsum(values * values - removed * removed)]
+        res_count = np.minimum(count + np.arange(m + 1), size)
+
+        positions = np.arange(j, end)
+        writes = np.maximum(positions - first_write + 1, 0)
+        full = res_count[writes] == size
+        ratio = (_stddev(totals[positions + 1] - totals[positions + 1 - size],
+                         squares[positions + 1] - squares[positions + 1 - size], size) /
+                 _stddev(res_total[writes], res_squares[writes], size))
+        shifted = np.flatnonzero(full & ((ratio > 1.0 + confidence) | (ratio < 1.0 - confidence)))
+
+        last = end if len(shifted) == 0 else j + shifted[0] + 1
+        relative_var[j:last] = np.where(full, ratio, np.nan)[:last - j]
+        # keep the writes up to the shift, the buffer is cleared there
+        w = writes[last - 1 - j]
+        committed = order[order < w]
+        if len(committed):
+            slot = slots[committed]
+            latest = np.r_[slot[1:] != slot[:-1], True]
+            elements[slot[latest]] = values[committed[latest]]
+        element_total, element_squares = int(res_total[w]), int(res_squares[w])
+        replacements = replacements[max(w - fills, 0):]
+        count = min(count + w, size)
+        if len(shifted) == 0:
+            j = end
+            chunk *= 2
+        else:
+            vol_drift.append(drift_index[last - 1])
+            # like the detector, the shift stays reported on the drifts right after it,
+            # until the next sample without a drift or the next comparison
+            start = last
+            while last < min(n, start + size - 1) and intervals[last] == 1:
+                vol_drift.append(drift_index[last])
+                last += 1
+            j = start + size - 1
+            chunk = size
+    return np.array(vol_drift, dtype=int), drift_index, intervals, relative_var
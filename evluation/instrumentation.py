@@ -0,0 +1,72 @@
+import os
+from time import perf_counter_ns, monotonic
+
+import psutil as pu
+
+
+class Instrumentation(object):
+    '''
+        Instrumentation of the prequential loop
+        ---------------------------------------
+        timing                  measure the running time of every predict/partial_fit step
+        memory                  measure the memory usage (%MEM) of the process
+        memory_every            refresh the memory usage every memory_every instances ...
+        memory_interval         ... or when memory_interval seconds have passed since the last refresh,
+                                whichever comes first; with neither, on every instance
+        enabled                 False turns timing and memory off altogether
+
+        Times come from the monotonic perf_counter_ns clock and are reported in seconds.
+        The memory usage is read through one cached process handle; between two
+        refreshes the last value is reported again.
+    '''
+
+    def __init__(self, timing=True, memory=True, memory_every=None, memory_interval=None, enabled=True):
+        self.timing = timing and enabled
+        self.memory = memory and enabled
+        self.memory_every = memory_every
+        self.memory_interval = memory_interval
+        self.process = None
+        self.memory_usage = 0.0
+        self.last_instance = None
+        self.last_time = None
+
+    def reset(self):
+        ''' forget the last memory sample and process handle, before a new evaluation run '''
+        self.process = None
+        self.memory_usage = 0.0
+        self.last_instance = None
+        self.last_time = None
+
+    def start(self):
+        ''' start timing a step, returns the start time '''
+        if self.timing:
+            return perf_counter_ns()
+        return 0
+
+    def stop(self, start_time):
+        ''' running time since start_time, in seconds '''
+        if self.timing:
+            return (perf_counter_ns() - start_time) * 1e-9
+        return 0.0
+
+    def memory_percent(self, t):
+        ''' memory usage (%MEM) at instance t, refreshed at most once per instance '''
+        if not self.memory:
+            return 0.0
+        if self.last_instance != t and self._due(t):
+            if self.process is None:
+                self.process = pu.Process(os.getpid())
+            self.memory_usage = self.process.memory_percent()
+            self.last_instance = t
+            self.last_time = monotonic()
+        return self.memory_usage
+
+    def _due(self, t):
+        if self.last_instance is None:
+            return True
+        if self.memory_every is None and self.memory_interval is None:
+            return True
+        if self.memory_every is not None and t - self.last_instance >= self.memory_every:
+            return True
+        return self.memory_interval is not None and monotonic() - self.last_time >= self.memory_interval
+
@@ -40,6 +40,34 @@ def Exact_match(Ytest,Ypred):
     N_test,L = Ytest.shape
     return sum(sum((Ytest == Ypred) * 1,axis=1)==L) * 1. / N_test
 
+def J_index_per_row(Ytest,Ypred):
+    ''' Jaccard index of each instance, in one vectorized pass '''
+    inter = sum((Ytest * Ypred) > 0, axis=1) * 1.
+    union = sum((Ytest + Ypred) > 0, axis=1) * 1.
+    empty = (sum(Ytest, axis=1) == 0) * 1.
+    return where(union > 0, inter / where(union > 0, union, 1.), empty)
+
+def Exact_match_per_row(Ytest,Ypred):
+    ''' exact match (0 or 1) of each instance '''
+    return all(Ytest == Ypred, axis=1) * 1.
+
+def Hamming_score_per_row(Ytest,Ypred):
+    ''' Hamming score of each instance '''
+    N_test,L = Ytest.shape
+    return sum((Ytest == Ypred) * 1.,axis=1) / L
+
+def Hamming_loss_per_row(Ytest,Ypred):
+    ''' Hamming loss of each instance '''
+    return 1.-Hamming_score_per_row(Ytest,Ypred)
+
+# per-instance variant of each averaged metric, see get_errors
+PER_ROW = {
+    J_index: J_index_per_row,
+    Exact_match: Exact_match_per_row,
+    Hamming_score: Hamming_score_per_row,
+    Hamming_loss: Hamming_loss_per_row,
+}
+
 def printEvalHeader():
     print("Algorithm            Jacc. Hamm. Exact Time  ")
 
@@ -49,10 +77,9 @@ def printEval(Ytest,Ypred,name="Method",time = 0.0):
 def Edit_distance(Ytest,Ypred):
     ''' Average edit distance '''
     N_test,L = Ytest.shape
-    s = 0.
-    for i in range(N_test):
-        s = s + edit_distance(Ytest[i,:],Ypred[i,:])
-    return s * 1. / N_test
+    if L == 0:
+        return 0.
+    return sum(prefix_edit_distances(Ytest,Ypred)[:,-1]) * 1. / N_test
 
 def h_loss(ytest,ypred):
     ''' note: required by edit_distance to only return bits (not average bits / L) '''
@@ -65,11 +92,29 @@ def Hamming_distances(Ytest,Ypred):
 
 def Edit_distances(Ytest,Ypred):
     N_test,L = Ytest.shape
-    d = zeros(L)
-    for j in range(L):
-        d[j] = Edit_distance(Ytest[:,0:j+1],Ypred[:,0:j+1])
+    d = sum(prefix_edit_distances(Ytest,Ypred),axis=0) * 1. / N_test
     return d / arange(1,L+1)
 
+def prefix_edit_distances(Ytest,Ypred):
+    '''
+        Edit distance between the prefixes Ytest[i,0:j+1] and Ypred[i,0:j+1], for every row i and length j+1.
+        They are the diagonal of the Levenshtein table of each row, which is filled one row of the table
+        at a time for all the N rows at once. Inside a table row, the insertion chain
+        v1[j+1] = min(v1[j] + 1, c[j+1]) is resolved as a running minimum of c[k] - k.
+    '''
+    N_test,L = Ytest.shape
+    j = arange(L + 1)
+    v0 = tile(j, (N_test, 1))
+    c = empty((N_test, L + 1), dtype=int)
+    D = zeros((N_test, L), dtype=int)
+    for i in range(L):
+        cost = (Ytest[:,i:i+1] != Ypred) * 1
+        c[:,0] = i + 1
+        c[:,1:] = minimum(v0[:,1:] + 1, v0[:,:-1] + cost)
+        v0 = minimum.accumulate(c - j, axis=1) + j
+        D[:,i] = v0[:,i+1]
+    return D
+
 def edit_distance(y, p):
     ''' 
         aka Levenshtein
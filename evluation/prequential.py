@@ -1,8 +1,10 @@
 from numpy import *
-from time import clock
-import resource as rs
-import os
-import psutil as pu
+import mmap
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from evluation.instrumentation import Instrumentation
 
 
 def exact(yt, yp):
@@ -13,10 +15,16 @@ def exact(yt, yp):
     return (yp == yt) * 1
 
 
-from evluation.metrics import J_index
+from evluation.metrics import J_index, PER_ROW
 
 
 def get_errors(Y, P, J=J_index):
+    '''
+        Score of each instance under the metric J
+        metrics with a per-instance variant in PER_ROW are computed in one vectorized pass
+    '''
+    if J in PER_ROW:
+        return PER_ROW[J](Y, P.reshape(Y.shape)) * 1.
     N, L = Y.shape
     E = zeros((N))
     for i in range(N):
@@ -24,7 +32,8 @@ def get_errors(Y, P, J=J_index):
     return E
 
 
-def prequential_evaluation(X, Y, H, N_train):
+def prequential_evaluation(X, Y, H, N_train, instrumentation=None, batch_size=1, n_jobs=1, metrics=None,
+                           store=True):
     '''
         Prequential Evaluation
         ----------------------
@@ -32,8 +41,53 @@ def prequential_evaluation(X, Y, H, N_train):
         Y                       labels
         H = [h_1,...,h_H]       a set of classifiers
         N_train                 number of instances for initial batch
+        instrumentation         an Instrumentation, measuring time and memory on every instance by default
+        batch_size              block-prequential mode: each model predicts a block of batch_size instances,
+                                then trains on it; the running time of a block is spread over its instances
+        n_jobs                  number of worker processes, the models are split into n_jobs groups that
+                                run in parallel on X, Y shared through shared memory (or through their file
+                                when they are memory-mapped); the trained models replace the ones in H
+        metrics                 a StreamingMetrics, updated online with the accuracy, running time and memory
+                                usage of every model (n_jobs=1 only)
+        store                   False does not keep the (M, T) E_pred, E_time, E_usage matrices, which are then
+                                returned as None; use it with metrics on unbounded streams
         return the label predictions for each test instance, and the associated running time 
     '''
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+
+    if n_jobs == 1 or len(H) <= 1:
+        return evaluate_models(X, Y, H, N_train, instrumentation, batch_size, metrics, store)
+    if metrics is not None or not store:
+        raise ValueError("streaming metrics and store=False need n_jobs=1")
+
+    groups = [g for g in array_split(arange(len(H)), n_jobs) if len(g) > 0]
+    X_shm, X_spec = share_array(X)
+    Y_shm, Y_spec = share_array(Y)
+    try:
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            futures = [pool.submit(_evaluate_shared_models, X_spec, Y_spec, [H[m] for m in g], N_train,
+                                   instrumentation, batch_size) for g in groups]
+            results = [pickle.loads(f.result()) for f in futures]
+    finally:
+        for shm in (X_shm, Y_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    for g, (H_g, _) in zip(groups, results):
+        for m, h in zip(g, H_g):
+            H[m] = h
+    E_pred, E_time, E_usage = [concatenate([E[i] for _, E in results]) for i in range(3)]
+    return E_pred, E_time, E_usage
+
+
+def evaluate_models(X, Y, H, N_train, instrumentation, batch_size=1, metrics=None, store=True):
+    '''
+        Run the prequential loop of prequential_evaluation on the models H, in this process
+    '''
+    instrumentation.reset()
+
     M = len(H)
     T, L = Y.shape
 
@@ -45,24 +99,103 @@ def prequential_evaluation(X, Y, H, N_train):
     Y = Y[N_train:]
     X = X[N_train:]
 
-    E_pred = zeros((M, T - N_train, L))
-    E_time = zeros((M, T - N_train))
-    E_usage = zeros((M, T - N_train))
+    E_pred = E_time = E_usage = None
+    if store:
+        E_pred = zeros((M, T - N_train, L))
+        E_time = zeros((M, T - N_train))
+        E_usage = zeros((M, T - N_train))
 
     for m in range(M):
         # start_time = clock()
         H[m].fit(X_init, Y_init)
         # E_time[m,0] = clock() - start_time
 
-    for t in range(0, T - N_train):
+    for t in range(0, T - N_train, batch_size):
+        X_block = X[t:t + batch_size]
+        Y_block = Y[t:t + batch_size]
+        B = len(X_block)
+        accuracy = zeros((M, B))
+        running_time = zeros((M, B))
+        usage = zeros((M, B))
         for m in range(M):
-            start_time = clock()
-            E_pred[m, t, :] = H[m].predict(X[t, :].reshape(1, -1))
-            H[m].partial_fit(X[t, :].reshape(1, -1), Y[t, :].reshape(1, -1))
-            E_time[m, t] += (clock() - start_time)
-            process = pu.Process(os.getpid())
-            # memory_use = py.memory_info()[0] / float(2 ** 30) # in GB
-            memory_use_percentage = process.memory_percent()
-            E_usage[m, t] = memory_use_percentage
+            start_time = instrumentation.start()
+            P_block = H[m].predict(X_block).reshape(B, -1)
+            H[m].partial_fit(X_block, Y_block)
+            running_time[m] = instrumentation.stop(start_time) / B
+            usage[m] = instrumentation.memory_percent(t)
+            if metrics is not None:
+                accuracy[m] = metrics.score(Y_block, P_block)
+            if store:
+                E_pred[m, t:t + B, :] = P_block
+        if store:
+            E_time[:, t:t + B] = running_time
+            E_usage[:, t:t + B] = usage
+        if metrics is not None:
+            metrics.update(accuracy, running_time, usage)
 
     return E_pred, E_time, E_usage
+
+
+def share_array(A):
+    '''
+        Make a numeric array reachable from other processes without pickling it
+        a contiguous memory-mapped file, or contiguous view of one, is shared through its path, any other
+        array is copied once into a new shared memory block
+        return the shared memory block (None for a memory-mapped file) and the spec given to attach_array
+    '''
+    if isinstance(A, memmap) and A.filename is not None and (A.flags.c_contiguous or A.flags.f_contiguous):
+        offset = _file_offset(A)
+        if offset is not None:
+            order = 'C' if A.flags.c_contiguous else 'F'
+            return None, ('file', A.filename, offset, A.shape, A.dtype.str, order)
+    A = ascontiguousarray(A)
+    if A.dtype.hasobject:
+        raise ValueError("only numeric arrays can be shared between processes, got dtype %s" % A.dtype)
+    shm = shared_memory.SharedMemory(create=True, size=A.nbytes or 1)
+    ndarray(A.shape, dtype=A.dtype, buffer=shm.buf)[...] = A
+    return shm, ('shm', shm.name, 0, A.shape, A.dtype.str, 'C')
+
+
+def _file_offset(A):
+    '''
+        Byte offset in its file of the first element of a memory-mapped array
+        the offset attribute of a view is the one of the array it was taken from, so the offset is
+        found from the address of the view in the memory-mapped array that owns the mapping
+        return None when no such array is found
+    '''
+    root = A
+    while isinstance(root.base, ndarray):
+        root = root.base
+    if not isinstance(root, memmap) or not isinstance(root.base, mmap.mmap):
+        return None
+    return root.offset + A.ctypes.data - root.ctypes.data
+
+
+def attach_array(spec):
+    '''
+        Attach to an array shared by share_array
+        return the handle to close once the array is no longer used, and the array
+    '''
+    kind, name, offset, shape, dtype, order = spec
+    if kind == 'file':
+        return None, memmap(name, dtype=dtype, mode='r', offset=offset, shape=shape, order=order)
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset, order=order)
+
+
+def _evaluate_shared_models(X_spec, Y_spec, H, N_train, instrumentation, batch_size):
+    '''
+        Evaluate a group of models in a worker process
+        return the pickled models and E matrices: the models may still hold views of the shared X and Y,
+        so they are pickled before the shared memory blocks are closed
+    '''
+    X_shm, X = attach_array(X_spec)
+    Y_shm, Y = attach_array(Y_spec)
+    try:
+        E = evaluate_models(X, Y, H, N_train, instrumentation, batch_size)
+        return pickle.dumps((H, E), protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        del X, Y, H
+        for shm in (X_shm, Y_shm):
+            if shm is not None:
+                shm.close()
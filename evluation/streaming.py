@@ -0,0 +1,131 @@
+from numpy import *
+
+from evluation.metrics import Exact_match, PER_ROW
+
+
+class WindowMean(object):
+    '''
+        Sliding-window mean
+        -------------------
+        Mean of the last `window` values of n parallel series (one per model). The values are kept in
+        a fixed (n, window) ring buffer with a running sum, so an update costs O(1) per value and the
+        memory does not grow with the stream. The running sum is recomputed every time the ring wraps
+        around, which keeps rounding errors from accumulating.
+    '''
+
+    def __init__(self, n, window=200):
+        self.window = window
+        self.values = zeros((n, window))
+        self.total = zeros(n)
+        self.index = 0
+        self.count = 0
+
+    def update(self, values):
+        ''' add a value (shape (n,)) or a block of values (shape (n, B)) to each series '''
+        values = asarray(values, dtype=float).reshape(len(self.total), -1)
+        B = values.shape[1]
+        if B >= self.window:
+            self.values[:, :] = roll(values[:, B - self.window:], (self.index + B) % self.window, axis=1)
+            self.total = self.values.sum(axis=1)
+        else:
+            positions = (self.index + arange(B)) % self.window
+            self.total += values.sum(axis=1) - self.values[:, positions].sum(axis=1)
+            self.values[:, positions] = values
+        self.count += B
+        wrapped = self.index + B >= self.window
+        self.index = (self.index + B) % self.window
+        if wrapped:
+            self.total = self.values.sum(axis=1)
+
+    def get(self):
+        ''' current mean of each series '''
+        if self.count == 0:
+            return zeros(len(self.total))
+        return self.total / float(self.count if self.count < self.window else self.window)
+
+
+class FadingMean(object):
+    '''
+        Fading-factor mean
+        ------------------
+        Mean of n parallel series where a value seen k instances ago has weight alpha^k:
+        S = alpha * S + x, N = alpha * N + 1, mean = S / N. Constant memory and time per value.
+
+        Gama, J., Sebastiao, R., Rodrigues, P.P.: "On evaluating stream learning algorithms".
+        Machine Learning 90(3), 317-346 (2013)
+    '''
+
+    def __init__(self, n, alpha=0.995):
+        self.alpha = alpha
+        self.total = zeros(n)
+        self.weight = 0.0
+
+    def update(self, values):
+        ''' add a value (shape (n,)) or a block of values (shape (n, B)) to each series '''
+        values = asarray(values, dtype=float).reshape(len(self.total), -1)
+        B = values.shape[1]
+        decay = self.alpha ** arange(B - 1, -1, -1)
+        self.total = self.alpha ** B * self.total + values.dot(decay)
+        self.weight = self.alpha ** B * self.weight + decay.sum()
+
+    def get(self):
+        ''' current mean of each series '''
+        if self.weight == 0:
+            return zeros(len(self.total))
+        return self.total / self.weight
+
+
+class StreamingMetrics(object):
+    '''
+        Online accuracy, latency and memory of the models of a prequential evaluation
+        -----------------------------------------------------------------------------
+        n_models                number of evaluated models
+        window                  length of the sliding windows
+        alpha                   fading factor
+        J                       per-instance score of the predictions, any metric of evluation.metrics.PER_ROW
+        every                   emit a report every `every` instances (None: never)
+        callback                callback(t, report) receiving the reports; without callback they are
+                                appended to self.reports
+
+        Each report maps 'accuracy', 'latency' and 'memory' + '_window' / '_fading' to an array with one
+        value per model, and t is the number of instances seen so far.
+    '''
+
+    NAMES = ('accuracy', 'latency', 'memory')
+
+    def __init__(self, n_models, window=200, alpha=0.995, J=Exact_match, every=None, callback=None):
+        self.J = J
+        self.every = every
+        self.callback = callback
+        self.reports = []
+        self.t = 0
+        self.window = dict((name, WindowMean(n_models, window)) for name in self.NAMES)
+        self.fading = dict((name, FadingMean(n_models, alpha)) for name in self.NAMES)
+
+    def score(self, Y, P):
+        ''' per-instance score of the predictions P of one model '''
+        return PER_ROW[self.J](Y, P.reshape(Y.shape))
+
+    def update(self, accuracy, latency, memory):
+        ''' add the values (shape (n_models,) or (n_models, B)) of one instance or block '''
+        values = {'accuracy': accuracy, 'latency': latency, 'memory': memory}
+        for name in self.NAMES:
+            self.window[name].update(values[name])
+            self.fading[name].update(values[name])
+        B = asarray(accuracy).reshape(len(self.window['accuracy'].total), -1).shape[1]
+        previous = self.t
+        self.t += B
+        if self.every is not None and self.t // self.every > previous // self.every:
+            report = self.report()
+            if self.callback is None:
+                self.reports.append((self.t, report))
+            else:
+                self.callback(self.t, report)
+
+    def report(self):
+        ''' current value of every accumulator '''
+        report = {}
+        for name in self.NAMES:
+            report[name + '_window'] = self.window[name].get()
+            report[name + '_fading'] = self.fading[name].get()
+        return report
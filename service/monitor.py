@@ -0,0 +1,174 @@
+""" Asyncio service monitoring many keyed streams with one drift detector per key """
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import asyncio
+from collections import namedtuple
+
+import numpy as np
+
+from drift_detector.DDM import DDM
+from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
+
+# kind is 'drift', 'warning' or 'volatility_shift'; position counts the values of the key from 0
+DriftEvent = namedtuple('DriftEvent', ['key', 'kind', 'timestamp', 'position'])
+
+_DONE = object()
+
+
+def detect(detector, values):
+    """
+    Feed a batch of values to a detector.
+
+    Parameters
+    ----------
+    detector : Adwin, DDM, VolatilityDetector or any detector with set_input()
+    values : array of float
+
+    Returns
+    -------
+    events : list of (kind, index) pairs
+        The drifts, warnings (DDM) and volatility shifts (VolatilityDetector)
+        found in the batch, with their position in values. A warning is only
+        reported when the detector enters its warning zone.
+    """
+    if isinstance(detector, DDM):
+        was_warning = detector.is_warning_zone
+        drift_index, warning_index = detector.set_input_many(values)
+        # the first value of every run of consecutive warnings
+        onset = np.diff(np.r_[-2 if not was_warning else -1, warning_index]) > 1
+        events = [('warning', i) for i in warning_index[onset].tolist()] + \
+                 [('drift', i) for i in drift_index.tolist()]
+        return sorted(events, key=lambda e: e[1])
+    if isinstance(detector, VolatilityDetector):
+        vol_drift_index, drift_index = detector.set_input_many(values)
+        events = [('drift', i) for i in drift_index.tolist()] + \
+                 [('volatility_shift', i) for i in vol_drift_index.tolist()]
+        return sorted(events, key=lambda e: e[1])
+    if hasattr(detector, 'set_input_many'):
+        return [('drift', i) for i in detector.set_input_many(values)[0].tolist()]
+    events = []
+    was_warning = getattr(detector, 'is_warning_zone', False)
+    for i, value in enumerate(values.tolist()):
+        if detector.set_input(value):
+            events.append(('drift', i))
+            was_warning = False
+        elif getattr(detector, 'is_warning_zone', False):
+            if not was_warning:
+                events.append(('warning', i))
+            was_warning = True
+        else:
+            was_warning = False
+    return events
+
+
+class DriftMonitor(object):
+    """
+    Route keyed events (key, value, timestamp) to one drift detector per key.
+
+    The detector of a key is created on its first event. Every key has its own
+    bounded queue and task: the task takes all the events waiting in its queue,
+    up to max_batch, as one micro-batch, feeds them to the detector in one call
+    and awaits the sink with the events it found. A key with a slow sink only
+    holds up its own queue; the source is only held up, for backpressure, when
+    the queue of the key of its next event is full.
+    """
+
+    def __init__(self, detector_factory, sink, max_batch=256, queue_size=1024):
+        """
+        Parameters
+        ----------
+        detector_factory : callable
+            detector_factory(key) returns a new detector for key, like Adwin() or DDM().
+        sink : coroutine function
+            await sink(event) receives every DriftEvent, like the put method of an asyncio.Queue.
+        max_batch : int
+            Largest number of events fed to a detector at once.
+        queue_size : int
+            Capacity of the queue of every key.
+        """
+        self.detector_factory = detector_factory
+        self.sink = sink
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.detectors = {}
+        self.positions = {}
+        self.events_seen = 0
+        self.batches = 0
+        self._queues = {}
+        self._tasks = {}
+
+    async def run(self, events):
+        """
+        Consume an async iterator of (key, value, timestamp) events until it is exhausted,
+        then wait for every key to be processed.
+
+        If the task of a key fails, for instance in its detector or its sink, its
+        exception is raised here and the tasks of the other keys are cancelled.
+        """
+        try:
+            async for key, value, timestamp in events:
+                if key not in self._queues:
+                    self._start(key)
+                await self._put(key, (value, timestamp))
+                self.events_seen += 1
+            for key in self._queues:
+                await self._put(key, _DONE)
+            await asyncio.gather(*self._tasks.values())
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+
+    def _start(self, key):
+        queue = asyncio.Queue(self.queue_size)
+        self._queues[key] = queue
+        self.detectors[key] = self.detector_factory(key)
+        self.positions[key] = 0
+        self._tasks[key] = asyncio.ensure_future(self._process(key, queue))
+        return queue
+
+    async def _put(self, key, item):
+        """Put an item in the queue of key, raising the exception of its task instead of waiting forever"""
+        queue = self._queues[key]
+        task = self._tasks[key]
+        if not task.done() and not queue.full():
+            queue.put_nowait(item)
+            return
+        if not task.done():
+            put = asyncio.ensure_future(queue.put(item))
+            await asyncio.wait((put, task), return_when=asyncio.FIRST_COMPLETED)
+            if put.done():
+                return
+            put.cancel()
+        # the task only ends before its last item if it failed
+        task.result()
+
+    async def _process(self, key, queue):
+        detector = self.detectors[key]
+        done = False
+        while not done:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1] is _DONE:
+                batch.pop()
+                done = True
+            if not batch:
+                continue
+            values = np.fromiter((value for value, _ in batch), dtype=float, count=len(batch))
+            start = self.positions[key]
+            self.positions[key] = start + len(batch)
+            self.batches += 1
+            for kind, i in detect(detector, values):
+                await self.sink(DriftEvent(key, kind, batch[i][1], start + i))
+            # a long backlog of one key does not starve the others
+            await asyncio.sleep(0)
+
+
+async def iterate(events):
+    """An in-process async source yielding the (key, value, timestamp) events of an iterable"""
+    for event in events:
+        yield event
@@ -0,0 +1,308 @@
+""" Detectors sharded across worker processes, fed through shared-memory rings """
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from drift_detector.snapshot import detector_from_bytes
+from service.monitor import DriftEvent, detect
+from service.shared_ring import SharedRing
+
+EVENT_DTYPE = np.dtype([('key', '<i8'), ('value', '<f8'), ('timestamp', '<f8')])
+RESULT_DTYPE = np.dtype([('key', '<i8'), ('kind', '<i8'), ('position', '<i8'), ('timestamp', '<f8')])
+KINDS = ('drift', 'warning', 'volatility_shift')
+_KIND_CODES = dict((kind, code) for code, kind in enumerate(KINDS))
+
+
+class ShardedDetectors(object):
+    """
+    One drift detector per integer key, the keys being hash-partitioned across worker processes.
+
+    Every worker owns the detectors of its keys. The events (key, value, timestamp)
+    reach it through a shared-memory ring and the drifts, warnings and volatility
+    shifts it finds come back through another one, as raw records. Only the rare
+    control messages (flush, migration, stop) go through a pipe.
+
+    A key can be moved to another worker with migrate(), which carries the state
+    of its detector as a to_bytes() snapshot; rebalance() moves the busiest keys
+    away from the most loaded workers.
+
+    Use it as a context manager, or call start() and close().
+    """
+
+    def __init__(self, detector_factory, n_shards=None, capacity=1 << 16, max_batch=4096, idle=0.0005):
+        """
+        Parameters
+        ----------
+        detector_factory : callable
+            detector_factory(key) returns a new detector for key, like Adwin or DDM; it must be
+            picklable when the workers are spawned.
+        n_shards : int
+            Number of worker processes, the number of CPUs by default.
+        capacity : int
+            Number of records of every ring.
+        max_batch : int
+            Largest number of events a worker takes from its ring at once.
+        idle : float
+            Sleep, in seconds, of a worker with an empty ring, or of a side waiting for room in a ring.
+        """
+        self.detector_factory = detector_factory
+        self.n_shards = n_shards or os.cpu_count()
+        self.capacity = capacity
+        self.max_batch = max_batch
+        self.idle = idle
+        self.key_counts = {}
+        self._overrides = {}
+        self._pending = []
+        self._events = []
+        self._results = []
+        self._conns = []
+        self._workers = []
+
+    def start(self):
+        """Start the worker processes"""
+        for shard in range(self.n_shards):
+            events = SharedRing(self.capacity, EVENT_DTYPE)
+            results = SharedRing(self.capacity, RESULT_DTYPE)
+            conn, worker_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_shard_worker,
+                                             args=(events.spec(), results.spec(), worker_conn, self.detector_factory,
+                                                   self.max_batch, self.idle), daemon=True)
+            worker.start()
+            worker_conn.close()
+            self._events.append(events)
+            self._results.append(results)
+            self._conns.append(conn)
+            self._workers.append(worker)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def shard_of(self, keys):
+        """Worker of each key: a multiplicative hash of the key, unless the key was migrated"""
+        keys = np.asarray(keys, dtype=np.int64)
+        shards = ((keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)) % np.uint64(self.n_shards)
+        shards = shards.astype(np.int64)
+        if self._overrides:
+            moved = np.fromiter(self._overrides.keys(), dtype=np.int64, count=len(self._overrides))
+            order = np.argsort(moved)
+            moved = moved[order]
+            targets = np.fromiter(self._overrides.values(), dtype=np.int64, count=len(self._overrides))[order]
+            position = np.minimum(np.searchsorted(moved, keys), len(moved) - 1)
+            match = moved[position] == keys
+            shards[match] = targets[position[match]]
+        return shards
+
+    def submit(self, keys, values, timestamps=None):
+        """
+        Send a batch of events to the workers, waiting for room in their rings if needed.
+
+        Parameters
+        ----------
+        keys : array-like of int
+        values : array-like of float
+        timestamps : array-like of float, optional
+            Timestamps of the events, their position in the batch by default.
+        """
+        records = np.empty(len(keys), dtype=EVENT_DTYPE)
+        records['key'] = keys
+        records['value'] = values
+        records['timestamp'] = np.arange(len(keys)) if timestamps is None else timestamps
+        unique, counts = np.unique(records['key'], return_counts=True)
+        for key, count in zip(unique.tolist(), counts.tolist()):
+            self.key_counts[key] = self.key_counts.get(key, 0) + count
+        shards = self.shard_of(records['key'])
+        for shard in range(self.n_shards):
+            batch = records[shards == shard]
+            pushed = self._events[shard].push(batch)
+            while pushed < len(batch):
+                self._check_worker(shard)
+                # the worker may be waiting for room in its result ring
+                if not self._collect():
+                    time.sleep(self.idle)
+                pushed += self._events[shard].push(batch[pushed:])
+
+    def results(self):
+        """The events found so far, as DriftEvent, grouped by worker; positions count the values of each key"""
+        self._collect()
+        pending, self._pending = self._pending, []
+        return [DriftEvent(key, KINDS[kind], timestamp, position) for key, kind, position, timestamp in pending]
+
+    def flush(self):
+        """Wait until the workers have processed every submitted event"""
+        for shard in range(self.n_shards):
+            self._request(shard, ('flush', self._events[shard].head))
+
+    def migrate(self, key, shard):
+        """Move the detector of key to the given worker, with its state"""
+        old = int(self.shard_of([key])[0])
+        if old == shard:
+            return
+        _, blob, position = self._request(old, ('export', key, self._events[old].head))
+        if blob is not None:
+            self._request(shard, ('import', key, blob, position))
+        self._overrides[key] = shard
+
+    def rebalance(self):
+        """
+        Move keys from the most loaded workers to the least loaded ones.
+
+        The load of a key is its number of events since the last rebalance. The
+        busiest key whose move narrows the gap between the most and the least
+        loaded workers is moved, until no move helps.
+
+        Returns
+        -------
+        moves : list of (key, old shard, new shard)
+        """
+        keys = np.fromiter(self.key_counts.keys(), dtype=np.int64, count=len(self.key_counts))
+        counts = np.fromiter(self.key_counts.values(), dtype=np.int64, count=len(self.key_counts))
+        shards = self.shard_of(keys)
+        loads = np.bincount(shards, weights=counts, minlength=self.n_shards)
+        moves = []
+        while True:
+            high, low = int(loads.argmax()), int(loads.argmin())
+            candidates = np.flatnonzero((shards == high) & (counts < loads[high] - loads[low]))
+            if len(candidates) == 0:
+                break
+            k = candidates[counts[candidates].argmax()]
+            self.migrate(int(keys[k]), low)
+            moves.append((int(keys[k]), high, low))
+            shards[k] = low
+            loads[high] -= counts[k]
+            loads[low] += counts[k]
+        self.key_counts = {}
+        return moves
+
+    def close(self):
+        """
+        Stop the workers once they have processed every submitted event, then free the rings.
+
+        A worker that exited already cannot be stopped, its rings are freed all the
+        same. If a worker exits while being stopped, RuntimeError is raised and the
+        workers not stopped yet are terminated.
+        """
+        stopped = set()
+        try:
+            for shard in range(len(self._workers)):
+                if self._workers[shard].is_alive():
+                    self._request(shard, ('stop', self._events[shard].head))
+                stopped.add(shard)
+            self._collect()
+        finally:
+            for shard, worker in enumerate(self._workers):
+                if shard not in stopped:
+                    worker.terminate()
+                worker.join()
+            for ring in self._events + self._results:
+                ring.close()
+            for conn in self._conns:
+                conn.close()
+            self._events, self._results, self._conns, self._workers = [], [], [], []
+
+    def _collect(self):
+        """Move the records of the result rings to the pending results, returns their number"""
+        n = 0
+        for ring in self._results:
+            records = ring.pop(ring.capacity)
+            if len(records) > 0:
+                self._pending.extend(records.tolist())
+                n += len(records)
+        return n
+
+    def _request(self, shard, message):
+        conn = self._conns[shard]
+        self._check_worker(shard)
+        try:
+            conn.send(message)
+            while not conn.poll(self.idle):
+                self._check_worker(shard)
+                self._collect()
+            return conn.recv()
+        except (OSError, EOFError):
+            # the pipe breaks once the worker has exited
+            self._workers[shard].join()
+            self._check_worker(shard)
+            raise
+
+    def _check_worker(self, shard):
+        """Raise RuntimeError if the worker of shard has exited, as nothing would drain its ring any more"""
+        worker = self._workers[shard]
+        if not worker.is_alive():
+            raise RuntimeError("worker %d of the sharded detectors exited with code %s" % (shard, worker.exitcode))
+
+
+def _shard_worker(events_spec, results_spec, conn, detector_factory, max_batch, idle):
+    events = SharedRing(*events_spec)
+    results = SharedRing(*results_spec)
+    detectors = {}
+    positions = {}
+    try:
+        while True:
+            if conn.poll():
+                message = conn.recv()
+                command = message[0]
+                if command in ('flush', 'stop', 'export'):
+                    # the events submitted before the message come first
+                    while events.tail < message[-1]:
+                        _process(events, results, detectors, positions, detector_factory, max_batch, idle)
+                if command == 'stop':
+                    conn.send(('stopped',))
+                    break
+                elif command == 'flush':
+                    conn.send(('flushed',))
+                elif command == 'export':
+                    detector = detectors.pop(message[1], None)
+                    position = positions.pop(message[1], 0)
+                    conn.send(('state', None if detector is None else detector.to_bytes(), position))
+                elif command == 'import':
+                    detectors[message[1]] = detector_from_bytes(message[2])
+                    positions[message[1]] = message[3]
+                    conn.send(('imported',))
+                continue
+            if not _process(events, results, detectors, positions, detector_factory, max_batch, idle):
+                time.sleep(idle)
+    finally:
+        events.close()
+        results.close()
+        conn.close()
+
+
+def _process(events, results, detectors, positions, detector_factory, max_batch, idle):
+    """Feed one batch of events of the ring to the detectors of their keys, returns the number of events"""
+    records = events.pop(max_batch)
+    if len(records) == 0:
+        return 0
+    keys = records['key']
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    bounds = np.r_[np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]), len(keys)]
+    found = []
+    for s, e in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        key = int(sorted_keys[s])
+        index = order[s:e]
+        detector = detectors.get(key)
+        if detector is None:
+            detector = detectors[key] = detector_factory(key)
+        start = positions.get(key, 0)
+        for kind, i in detect(detector, records['value'][index]):
+            found.append((key, _KIND_CODES[kind], start + i, records['timestamp'][index[i]]))
+        positions[key] = start + e - s
+    if found:
+        found = np.array(found, dtype=RESULT_DTYPE)
+        pushed = results.push(found)
+        while pushed < len(found):
+            time.sleep(idle)
+            pushed += results.push(found[pushed:])
+    return len(records)
@@ -0,0 +1,91 @@
+""" Single-producer, single-consumer ring buffer of fixed-size records in shared memory """
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# head and tail counters, each on its own cache line
+_HEADER = 128
+
+
+class SharedRing(object):
+    """
+    A ring of capacity records of a numpy structured dtype, in a shared memory block.
+
+    One process pushes, another one pops. The head (records pushed) and tail
+    (records popped) counters only grow; each side writes its own counter after
+    the records, so the other side never sees a record before it is complete.
+    Records cross the ring as raw bytes, nothing is pickled.
+    """
+
+    def __init__(self, capacity, dtype, name=None):
+        """
+        Parameters
+        ----------
+        capacity : int
+            Number of records.
+        dtype : numpy dtype of the records
+        name : str, optional
+            Name of an existing ring to attach to, a new ring is created by default.
+        """
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        size = _HEADER + capacity * self.dtype.itemsize
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self._head = np.ndarray(1, dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._tail = np.ndarray(1, dtype=np.int64, buffer=self.shm.buf, offset=64)
+        self.records = np.ndarray(capacity, dtype=self.dtype, buffer=self.shm.buf, offset=_HEADER)
+        if self.owner:
+            self._head[0] = 0
+            self._tail[0] = 0
+
+    def spec(self):
+        """Arguments attaching another process to this ring: SharedRing(*spec)"""
+        return self.capacity, self.dtype, self.shm.name
+
+    @property
+    def head(self):
+        return int(self._head[0])
+
+    @property
+    def tail(self):
+        return int(self._tail[0])
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, records):
+        """Push as many records as there is room for, returns their number"""
+        head = self.head
+        n = min(len(records), self.capacity - (head - self.tail))
+        if n <= 0:
+            return 0
+        start = head % self.capacity
+        first = min(n, self.capacity - start)
+        self.records[start:start + first] = records[:first]
+        self.records[:n - first] = records[first:n]
+        self._head[0] = head + n
+        return n
+
+    def pop(self, max_records):
+        """Pop up to max_records records, returns a copy of them"""
+        tail = self.tail
+        n = min(max_records, self.head - tail)
+        start = tail % self.capacity
+        first = min(n, self.capacity - start)
+        records = np.concatenate((self.records[start:start + first], self.records[:n - first]))
+        self._tail[0] = tail + n
+        return records
+
+    def close(self):
+        """Detach from the ring, and free it if this process created it"""
+        del self._head, self._tail, self.records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,114 @@
+""" Binary, memory-mapped cache of csv data streams """
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """sha256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_stream(path, label_columns, label_maps=None, cache_dir=None):
+    """
+    Load a csv data stream as memory-mapped instance and label matrices.
+
+    The first call parses the csv file and writes the columns into a binary
+    cache: one column-major .npy file for the instances, one for the labels
+    and a json header. Later calls memory-map the .npy files, without parsing
+    the csv again, as long as the sha256 of the csv file matches the one
+    recorded in the header.
+
+    Parameters
+    ----------
+    path : str
+        Path of the csv file, with a header line.
+    label_columns : list of str
+        Columns holding the labels, every other column is a feature.
+    label_maps : dict, optional
+        Maps a label column to a dict translating its values into integers,
+        like {'class': {'UP': 0, 'DOWN': 1}}.
+    cache_dir : str, optional
+        Directory of the cache files, .stream_cache next to the csv file by default.
+
+    Returns
+    -------
+    X : read-only memory-mapped array, shape = [n_samples, n_features]
+    Y : read-only memory-mapped array, shape = [n_samples, n_labels]
+    """
+    label_maps = label_maps or {}
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), '.stream_cache')
+    stem = os.path.join(cache_dir, os.path.splitext(os.path.basename(path))[0])
+    header_path = stem + '.json'
+    X_path = stem + '.X.npy'
+    Y_path = stem + '.Y.npy'
+
+    source_hash = file_hash(path)
+    header = {
+        'version': CACHE_VERSION,
+        'source_sha256': source_hash,
+        'label_columns': list(label_columns),
+        'label_maps': label_maps,
+    }
+    if not _is_valid(header_path, header, (X_path, Y_path)):
+        _write_cache(path, header, header_path, X_path, Y_path)
+    return np.load(X_path, mmap_mode='r'), np.load(Y_path, mmap_mode='r')
+
+
+def _is_valid(header_path, header, paths):
+    if not all(os.path.exists(p) for p in (header_path,) + paths):
+        return False
+    with open(header_path) as f:
+        cached = json.load(f)
+    return all(cached.get(key) == value for key, value in header.items())
+
+
+def _write_cache(path, header, header_path, X_path, Y_path):
+    df = pd.read_csv(path)
+    for column, mapping in header['label_maps'].items():
+        df[column] = df[column].map(mapping)
+    label_columns = header['label_columns']
+    feature_columns = [c for c in df.columns if c not in label_columns]
+    X = np.asfortranarray(df[feature_columns].to_numpy(dtype=float))
+    Y = df[label_columns].to_numpy()
+    Y = np.asfortranarray(Y.astype(np.int64 if np.issubdtype(Y.dtype, np.integer) else float))
+
+    os.makedirs(os.path.dirname(header_path), exist_ok=True)
+    for target, A in ((X_path, X), (Y_path, Y)):
+        _publish(target, 'wb', lambda f: np.save(f, A))
+    header = dict(header, feature_columns=feature_columns,
+                  X_shape=list(X.shape), X_dtype=X.dtype.str, Y_shape=list(Y.shape), Y_dtype=Y.dtype.str)
+    _publish(header_path, 'w', lambda f: json.dump(header, f, indent=2))
+
+
+def _publish(target, mode, write):
+    """Write a file through a temporary file of its own, then move it into place
+
+    Processes filling the same cache entry at once each write their own
+    temporary file, and the last os.replace wins with a complete file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=os.path.basename(target) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
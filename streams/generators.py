@@ -0,0 +1,220 @@
+""" Synthetic data streams with known change points """
+
+# Authors: Wenjun Bai <vivianbai.cn@gmail.com>
+#          Shu Shang <ignatius.sun@gmail.com>
+#          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
+# License: BSD 3 clause
+
+import abc
+
+import numpy as np
+
+
+def evenly_spaced(n, n_changes):
+    """n_changes change points evenly spaced over a stream of n samples"""
+    return (np.arange(1, n_changes + 1) * n) // (n_changes + 1)
+
+
+class DriftStream(abc.ABC):
+    """
+    A stream of n samples going through a sequence of concepts.
+
+    Concept k starts at change_points[k - 1]. With width > 0 the changes are
+    gradual: during the first width samples of concept k, a sample comes from
+    concept k with a probability (or weight) growing linearly from 1 / width
+    to 1, and from concept k - 1 otherwise. The change points should then be
+    at least width samples apart.
+
+    The samples are drawn chunk by chunk with vectorized NumPy operations;
+    the concept of each sample is laid out per segment of the chunk, not
+    looked up per sample.
+    """
+
+    def __init__(self, n, change_points=(), width=0, seed=None):
+        """
+        Parameters
+        ----------
+        n : int
+            Length of the stream.
+        change_points : array-like of int
+            Sorted positions where a new concept starts, the ground truth of the stream.
+        width : int
+            Length of the gradual changes, 0 for abrupt changes.
+        seed : None, int or numpy.random.Generator
+            Seed of the random generator drawing the samples.
+        """
+        self.n = n
+        self.change_points = np.asarray(change_points, dtype=np.int64)
+        self.width = width
+        self.rand = np.random.default_rng(seed)
+        self._bounds = np.r_[0, self.change_points, n]
+
+    @property
+    def n_concepts(self):
+        return len(self.change_points) + 1
+
+    def chunks(self, chunk_size=1 << 16):
+        """Generate the stream as consecutive chunks of chunk_size samples, see _draw() for their contents"""
+        for start in range(0, self.n, chunk_size):
+            yield self._draw(*self._schedule(start, min(start + chunk_size, self.n)))
+
+    def generate(self):
+        """The whole stream, in one chunk"""
+        return self._draw(*self._schedule(0, self.n))
+
+    def _schedule(self, start, stop):
+        """Concept of every sample of [start, stop) and weight of that concept against the previous one"""
+        first = np.searchsorted(self._bounds, start, side='right') - 1
+        last = np.searchsorted(self._bounds, stop, side='left')
+        bounds = np.clip(self._bounds[first:last + 1], start, stop)
+        concept = np.repeat(np.arange(first, last), np.diff(bounds))
+        mix = np.ones(stop - start)
+        if self.width > 0:
+            for k in range(max(first, 1), last):
+                begin = self._bounds[k]
+                a = max(begin, start)
+                b = min(begin + self.width, self._bounds[k + 1], stop)
+                if a < b:
+                    mix[a - start:b - start] = (np.arange(a, b) - begin + 1) / float(self.width)
+        return concept, mix
+
+    def _pick(self, concept, mix):
+        """Concept each sample is drawn from, the previous one with probability 1 - mix"""
+        if self.width == 0:
+            return concept
+        return concept - (self.rand.random(len(concept)) >= mix)
+
+    @abc.abstractmethod
+    def _draw(self, concept, mix):
+        """The samples of a chunk, given the concept and the mix of each of them by _schedule()"""
+
+
+class BernoulliStream(DriftStream):
+    """0/1 stream, like the errors of a classifier, whose rate p changes at every change point"""
+
+    def __init__(self, n, change_points=(), p=None, width=0, seed=None):
+        """
+        Parameters
+        ----------
+        p : array-like of float, optional
+            Rate of each concept, drawn uniformly from [0.05, 0.6] by default.
+        """
+        super(BernoulliStream, self).__init__(n, change_points, width, seed)
+        if p is None:
+            p = self.rand.uniform(0.05, 0.6, self.n_concepts)
+        self.p = np.asarray(p, dtype=float)
+
+    def _draw(self, concept, mix):
+        """array of 0.0 / 1.0, shape = [n_samples]"""
+        p = self.p[concept]
+        if self.width > 0:
+            p = self.p[np.maximum(concept - 1, 0)] * (1 - mix) + p * mix
+        return (self.rand.random(len(concept)) < p).astype(float)
+
+
+class GaussianStream(DriftStream):
+    """Gaussian stream whose mean shifts at every change point"""
+
+    def __init__(self, n, change_points=(), means=None, sigma=1.0, width=0, seed=None):
+        """
+        Parameters
+        ----------
+        means : array-like of float, optional
+            Mean of each concept, drawn uniformly from [-2, 2] by default.
+        sigma : float
+            Standard deviation of every concept.
+        """
+        super(GaussianStream, self).__init__(n, change_points, width, seed)
+        if means is None:
+            means = self.rand.uniform(-2, 2, self.n_concepts)
+        self.means = np.asarray(means, dtype=float)
+        self.sigma = sigma
+
+    def _draw(self, concept, mix):
+        """array of float, shape = [n_samples]"""
+        mean = self.means[concept]
+        if self.width > 0:
+            mean = self.means[np.maximum(concept - 1, 0)] * (1 - mix) + mean * mix
+        return mean + self.sigma * self.rand.standard_normal(len(concept))
+
+
+class SEAStream(DriftStream):
+    """
+    SEA concepts: three features uniform in [0, 10], the label is 1 when
+    x0 + x1 <= threshold, the threshold of concept k being thresholds[k % 4].
+    A fraction noise of the labels is flipped.
+
+    Street, W.N., Kim, Y.: "A streaming ensemble algorithm (SEA) for large-scale
+    classification". KDD 2001, pp. 377-382 (2001)
+    """
+
+    THRESHOLDS = (8.0, 9.0, 7.0, 9.5)
+
+    def __init__(self, n, change_points=(), thresholds=THRESHOLDS, noise=0.1, width=0, seed=None):
+        super(SEAStream, self).__init__(n, change_points, width, seed)
+        self.thresholds = np.asarray(thresholds, dtype=float)
+        self.noise = noise
+
+    def _draw(self, concept, mix):
+        """X : array of float, shape = [n_samples, 3], Y : array of float, shape = [n_samples, 1]"""
+        threshold = self.thresholds[self._pick(concept, mix) % len(self.thresholds)]
+        X = self.rand.uniform(0, 10, (len(concept), 3))
+        y = (X[:, 0] + X[:, 1] <= threshold) ^ (self.rand.random(len(concept)) < self.noise)
+        return X, y.astype(float).reshape(-1, 1)
+
+
+class STAGGERStream(DriftStream):
+    """
+    STAGGER concepts over three categorical features, size, color and shape,
+    each coded 0 .. 2. Concept k uses the rule k % 3:
+    0: size = small and color = red, 1: color = green or shape = circle,
+    2: size = medium or size = large.
+
+    Schlimmer, J.C., Granger, R.H.: "Incremental learning from noisy data".
+    Machine Learning 1(3), 317-354 (1986)
+    """
+
+    def _draw(self, concept, mix):
+        """X : array of int, shape = [n_samples, 3], Y : array of float, shape = [n_samples, 1]"""
+        rule = self._pick(concept, mix) % 3
+        X = self.rand.integers(0, 3, (len(concept), 3))
+        size, color, shape = X[:, 0], X[:, 1], X[:, 2]
+        y = np.where(rule == 0, (size == 0) & (color == 0),
+                     np.where(rule == 1, (color == 1) | (shape == 1), size >= 1))
+        return X, y.astype(float).reshape(-1, 1)
+
+
+class VolatilityShiftStream(BernoulliStream):
+    """
+    0/1 error stream whose rate of change (volatility) shifts: the stream
+    goes through regimes starting at volatility_points, and in regime r the
+    concepts last a number of samples drawn uniformly from intervals[r % len(intervals)].
+    The change points of the error rate and the volatility points are both
+    known, for testing the VolatilityDetector.
+    """
+
+    def __init__(self, n, volatility_points=(), intervals=((500, 1000), (100, 200)), p=(0.1, 0.5), seed=None):
+        """
+        Parameters
+        ----------
+        volatility_points : array-like of int
+            Sorted positions where a new volatility regime starts.
+        intervals : sequence of (low, high)
+            Range of the concept lengths of each regime.
+        p : array-like of float
+            Error rates the concepts alternate between.
+        """
+        rand = np.random.default_rng(seed)
+        self.volatility_points = np.asarray(volatility_points, dtype=np.int64)
+        bounds = np.r_[0, self.volatility_points, n]
+        change_points = []
+        for r in range(len(bounds) - 1):
+            low, high = intervals[r % len(intervals)]
+            # enough lengths to cover the regime, drawn at once
+            lengths = rand.integers(low, high + 1, (bounds[r + 1] - bounds[r]) // low + 1)
+            points = bounds[r] + np.cumsum(lengths)
+            change_points.append(points[points < bounds[r + 1]])
+        change_points = np.concatenate(change_points)
+        p = np.asarray(p, dtype=float)
+        super(VolatilityShiftStream, self).__init__(n, change_points, p[np.arange(len(change_points) + 1) % len(p)],
+                                                    seed=rand)
@@ -11,7 +11,6 @@ performance: Accuracy, Time and memory usage
 #          Duyen Phuc Nguyen <nguyenduyenphuc@gmail.com>
 # License: BSD 3 clause
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -22,6 +21,8 @@ from drift_detector.DDM import DDM
 from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
 from evluation.metrics import Exact_match
 from evluation.prequential import prequential_evaluation, get_errors
+from evluation.streaming import StreamingMetrics
+from streams.cache import load_stream
 
 np.random.seed(0)
 
@@ -43,24 +44,20 @@ shape = (45312, 9)
 n_features = 8
 label = column['class'] = {"UP", "DOWN"}
 """
-df = pd.read_csv("data/elecNormNew.csv")
-df['class'] = df['class'].map({'UP': 0, 'DOWN': 1})
-L = 8
+X, Y = load_stream("data/elecNormNew.csv", label_columns=['class'], label_maps={'class': {'UP': 0, 'DOWN': 1}})
 N_train = 1000
 
-labels = df.columns.values.tolist()[L:]
-data = df.values
-T = len(data)
-Y = data[:, L:]
-X = data[:, 0:L]
+T = len(Y)
 
 print("Experimentation")
 
 h = [DetectorClassifier(GaussianNB(), Adwin()),
-     DetectorClassifier(GaussianNB(), VolatilityDetector(drift_detector=Adwin(), size=32)),
+     DetectorClassifier(GaussianNB(), VolatilityDetector(drift_detector=Adwin(), size=32, seed=0)),
      DetectorClassifier(GaussianNB(), DDM()),
      GaussianNB()]
-E_pred, E_time, E_usage = prequential_evaluation(X, Y, h, N_train)
+w = 200
+metrics = StreamingMetrics(len(h), window=w, J=Exact_match, every=10)
+E_pred, E_time, E_usage = prequential_evaluation(X, Y, h, N_train, metrics=metrics)
 
 print("Evaluation")
 
@@ -70,7 +67,10 @@ for m in range(len(h)):
 
 print("Plot Results")
 print("---------------------------------------")
-w = 200
+t_run = np.array([t for t, report in metrics.reports])
+acc_runs = np.array([report['accuracy_window'] for t, report in metrics.reports]).T
+time_runs = np.array([report['latency_window'] for t, report in metrics.reports]).T
+usage_runs = np.array([report['memory_window'] for t, report in metrics.reports]).T
 fig, axes = plt.subplots(nrows=3, ncols=1)
 fig.tight_layout()
 for m in range(len(h)):
@@ -87,23 +87,23 @@ for m in range(len(h)):
     if h[m].__class__.__name__ == 'DetectorClassifier':
         print("Number of detected drifts: %d" % h[m].num_change_detected)
     print("---------------------------------------")
-    acc_run = np.convolve(E[m, :], np.ones((w,)) / w, 'same')
-    acc_time = np.convolve(E_time[m, :], np.ones((w,)) / w, 'same')
-    acc_usage = np.convolve(E_usage[m, :], np.ones((w,)) / w, 'same')
+    acc_run = acc_runs[m]
+    acc_time = time_runs[m]
+    acc_usage = usage_runs[m]
     if h[m].__class__.__name__ == 'DetectorClassifier':
         plt.subplot(3, 1, 1)
-        plt.plot(np.arange(len(acc_run)), acc_run, '-', label=h[m].get_detector_name())
+        plt.plot(t_run, acc_run, '-', label=h[m].get_detector_name())
         plt.subplot(3, 1, 2)
-        plt.plot(np.arange(len(acc_time)), acc_time, '-', label=h[m].get_detector_name())
+        plt.plot(t_run, acc_time, '-', label=h[m].get_detector_name())
         plt.subplot(3, 1, 3)
-        plt.plot(np.arange(len(acc_usage)), acc_usage, '-', label=h[m].get_detector_name())
+        plt.plot(t_run, acc_usage, '-', label=h[m].get_detector_name())
     else:
         plt.subplot(3, 1, 1)
-        plt.plot(np.arange(len(acc_run)), acc_run, '-', label=h[m].__class__.__name__)
+        plt.plot(t_run, acc_run, '-', label=h[m].__class__.__name__)
         plt.subplot(3, 1, 2)
-        plt.plot(np.arange(len(acc_time)), acc_time, '-', label=h[m].__class__.__name__)
+        plt.plot(t_run, acc_time, '-', label=h[m].__class__.__name__)
         plt.subplot(3, 1, 3)
-        plt.plot(np.arange(len(acc_usage)), acc_usage, '-', label=h[m].__class__.__name__)
+        plt.plot(t_run, acc_usage, '-', label=h[m].__class__.__name__)
 
 plt.subplot(3, 1, 1)
 plt.xlabel('Instance(samples)')
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.adwin_schedulers import EstimateMoved, EveryK, Geometric
+
+CONFIGS = {
+    'default': lambda: Adwin(),
+    'small delta': lambda: Adwin(delta=0.002),
+    'large delta': lambda: Adwin(delta=0.1),
+    'max_window': lambda: Adwin(max_window=1000),
+    'max_rows': lambda: Adwin(max_rows=6),
+    'both bounds': lambda: Adwin(max_window=20, max_rows=3),
+    'every 5': lambda: Adwin(scheduler=EveryK(5)),
+    'geometric': lambda: Adwin(scheduler=Geometric()),
+    'estimate moved': lambda: Adwin(scheduler=EstimateMoved()),
+}
+
+
+def make_values(seed, n=8000):
+    rng = np.random.default_rng(seed)
+    p = np.repeat(rng.random(6), n // 6 + 1)[:n]
+    if seed % 2:
+        return (rng.random(n) < p).astype(float)
+    return p + rng.normal(0, 0.2, n)
+
+
+def state(adwin):
+    return (adwin.width, adwin.sum, adwin.variance, adwin.bucket_number, adwin.mint_time, adwin.last_bucket_row,
+            adwin.bucket_list.rows())
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('config', sorted(CONFIGS))
+def test_set_input_many_matches_set_input(config, seed):
+    values = make_values(seed)
+    one, many = CONFIGS[config](), CONFIGS[config]()
+    drifts, positions = [], []
+    for i, v in enumerate(values.tolist()):
+        if one.set_input(v):
+            drifts.append(i)
+            positions.append(one.drift_position)
+    many_drifts, many_positions = [], []
+    cuts = [0, 1, 700, 701, 5000, len(values)]
+    for lo, hi in zip(cuts, cuts[1:]):
+        drift, estimation, width = many.set_input_many(values[lo:hi])
+        many_drifts += (drift + lo).tolist()
+        many_positions += many.drift_positions.tolist()
+    assert drifts == many_drifts
+    assert positions == many_positions
+    assert state(one) == state(many)
+    assert estimation == one.get_estimation() and width == one.length()
+
+
+def test_detects_an_abrupt_change():
+    adwin = Adwin()
+    values = np.r_[np.zeros(2000), np.ones(2000)]
+    drift = adwin.set_input_many(values)[0]
+    assert len(drift) > 0 and 2000 <= drift[0] < 2200
+
+
+@pytest.mark.parametrize('bounds', [dict(max_window=300), dict(max_rows=4)])
+def test_bounded_window(bounds):
+    adwin = Adwin(**bounds)
+    rng = np.random.default_rng(0)
+    for v in (rng.random(20000) < 0.3).tolist():
+        adwin.set_input(v)
+        if 'max_window' in bounds:
+            assert adwin.width <= bounds['max_window']
+        else:
+            assert adwin.bucket_list.count <= bounds['max_rows']
+
+
+def test_every_sample_scheduler_matches_default():
+    values = make_values(1)
+    plain, scheduled = Adwin(), Adwin(scheduler=EveryK(1))
+    assert [plain.set_input(v) for v in values.tolist()] == [scheduled.set_input(v) for v in values.tolist()]
+    assert state(plain) == state(scheduled)
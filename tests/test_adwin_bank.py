@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.adwin_bank import AdwinBank
+
+
+@pytest.mark.parametrize('capacity', [1, 3, 8])
+def test_bank_matches_standalone_detectors(capacity):
+    rng = np.random.default_rng(2)
+    n_streams = 20
+    bank = AdwinBank(n_streams, delta=0.05, capacity=capacity)
+    detectors = [Adwin(delta=0.05) for _ in range(n_streams)]
+    p = rng.random(n_streams) * 0.5
+    for t in range(1500):
+        if t % 500 == 0:
+            p = rng.random(n_streams) * 0.6
+        # repeated ids within a tick are applied in order
+        ids = rng.integers(0, n_streams, rng.integers(0, 40))
+        values = (rng.random(len(ids)) < p[ids]).astype(float)
+        if t % 3 == 0:
+            values += rng.normal(0, 0.2, len(ids))
+        drift = bank.set_input(ids, values)
+        expected = [detectors[i].set_input(v) for i, v in zip(ids.tolist(), values.tolist())]
+        assert drift.tolist() == expected
+    assert bank.width.tolist() == [d.width for d in detectors]
+    assert bank.sum.tolist() == [d.sum for d in detectors]
+    assert bank.variance.tolist() == [d.variance for d in detectors]
+    assert bank.get_estimation().tolist() == [d.get_estimation() for d in detectors]
+
+
+def test_dense_rows_do_not_grow():
+    bank = AdwinBank(100, capacity=4)
+    rng = np.random.default_rng(0)
+    for _ in range(3000):
+        bank.set_input([0], (rng.random(1) < 0.3) * 1.)
+    assert bank.row_count[0] > 4
+    assert bank.bucket_size.shape == (100, 4)
+    assert bank.overflow_slot[0] >= 0 and (bank.overflow_slot[1:] < 0).all()
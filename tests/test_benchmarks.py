@@ -0,0 +1,33 @@
+import json
+
+from benchmarks.cases import Case
+from benchmarks.runner import compare, run_benchmarks
+
+
+def make_case(n):
+    def setup():
+        values = list(range(n))
+
+        def run():
+            sum(values)
+            return n
+        return run
+    return Case('sum', {'n': n}, setup)
+
+
+def test_results_document():
+    results = run_benchmarks([make_case(1000), make_case(2000)], repeat=1)
+    json.dumps(results)
+    assert [r['key'] for r in results['results']] == ['sum[n=1000]', 'sum[n=2000]']
+    assert all(r['samples'] > 0 and r['throughput'] > 0 for r in results['results'])
+
+
+def test_compare():
+    def document(*results):
+        return {'results': [dict(key=key, throughput=throughput, peak_memory=memory)
+                            for key, throughput, memory in results]}
+    baseline = document(('a', 100.0, 1000), ('b', 100.0, 1000), ('c', 100.0, 0))
+    results = document(('a', 90.0, 1100), ('b', 70.0, 1000), ('c', 100.0, 50), ('new', 1.0, 1))
+    comparison = dict((c['key'], c) for c in compare(results, baseline, tolerance=0.2))
+    assert sorted(comparison) == ['a', 'b', 'c']
+    assert not comparison['a']['regression'] and comparison['b']['regression'] and not comparison['c']['regression']
@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from streams.cache import load_stream
+
+
+def write_csv(path, n=200):
+    rng = np.random.default_rng(0)
+    with open(path, 'w') as f:
+        f.write('a,b,class\n')
+        for a, b in rng.random((n, 2)).tolist():
+            f.write('%r,%r,%s\n' % (a, b, 'UP' if a > b else 'DOWN'))
+
+
+def load(path):
+    X, Y = load_stream(path, ['class'], {'class': {'UP': 0, 'DOWN': 1}})
+    return np.array(X), np.array(Y)
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / 'stream.csv')
+    write_csv(path)
+    X, Y = load(path)
+    X_cached, Y_cached = load(path)
+    assert X.shape == (200, 2) and Y.shape == (200, 1)
+    np.testing.assert_array_equal(X, X_cached)
+    np.testing.assert_array_equal(Y[:, 0], (X[:, 0] <= X[:, 1]) * 1)
+
+
+def test_concurrent_fills(tmp_path):
+    path = str(tmp_path / 'stream.csv')
+    write_csv(path, n=5000)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(load, [path] * 8))
+    for X, Y in results[1:]:
+        np.testing.assert_array_equal(X, results[0][0])
+        np.testing.assert_array_equal(Y, results[0][1])
+    # no temporary file is left behind
+    assert all(name.endswith(('.npy', '.json')) for name in os.listdir(str(tmp_path / '.stream_cache')))
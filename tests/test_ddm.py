@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from drift_detector.DDM import DDM, DDMBank
+
+
+def make_errors(seed, n=20000):
+    rng = np.random.default_rng(seed)
+    rate = np.repeat(rng.uniform(0.05, 0.5, 10), n // 10)
+    return (rng.random(n) < rate).astype(float)
+
+
+def run_one_by_one(ddm, errors):
+    drifts, warnings = [], []
+    for i, e in enumerate(errors.tolist()):
+        if ddm.set_input(e):
+            drifts.append(i)
+        elif ddm.is_warning_zone:
+            warnings.append(i)
+    return drifts, warnings
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_set_input_many_matches_set_input(seed):
+    errors = make_errors(seed)
+    one, many = DDM(), DDM()
+    drifts, warnings = run_one_by_one(one, errors)
+    many_drifts, many_warnings = [], []
+    cuts = [0, 1, 999, 12345, len(errors)]
+    for lo, hi in zip(cuts, cuts[1:]):
+        drift_index, warning_index = many.set_input_many(errors[lo:hi])
+        many_drifts += (drift_index + lo).tolist()
+        many_warnings += (warning_index + lo).tolist()
+    assert len(drifts) > 0
+    assert drifts == many_drifts
+    assert warnings == many_warnings
+    assert one.to_bytes() == many.to_bytes()
+
+
+def test_bank_matches_standalone_detectors():
+    rng = np.random.default_rng(0)
+    n_streams = 30
+    bank = DDMBank(n_streams)
+    detectors = [DDM() for _ in range(n_streams)]
+    rate = rng.uniform(0.05, 0.4, n_streams)
+    for t in range(3000):
+        if t % 1000 == 0:
+            rate = rng.uniform(0.05, 0.6, n_streams)
+        ids = rng.integers(0, n_streams, rng.integers(0, 50))
+        errors = (rng.random(len(ids)) < rate[ids]).astype(float)
+        drift = bank.set_input(ids, errors)
+        assert drift.tolist() == [detectors[i].set_input(e) for i, e in zip(ids.tolist(), errors.tolist())]
+    assert bank.is_warning_zone.tolist() == [d.is_warning_zone for d in detectors]
+    assert bank.estimation.tolist() == [d.estimation for d in detectors]
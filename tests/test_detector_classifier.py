@@ -0,0 +1,19 @@
+import numpy as np
+from sklearn.naive_bayes import GaussianNB
+
+from classifiers.detector_classifier import DetectorClassifier
+from tests.test_prequential import AlwaysWarning
+
+
+def test_background_buffer_keeps_copies():
+    rng = np.random.default_rng(0)
+    X = rng.random((40, 3))
+    y = (X[:, 0] > 0.5).astype(int)
+    h = DetectorClassifier(GaussianNB(), AlwaysWarning()).fit(X, y)
+    X_block, y_block = X[:10].copy(), y[:10].copy()
+    h.partial_fit(X_block, y_block)
+    # the caller reuses its buffers for the next block
+    X_block[...] = 0.0
+    y_block[...] = 0
+    np.testing.assert_array_equal(h.buffer[0][0], X[:10])
+    np.testing.assert_array_equal(h.buffer[0][1], y[:10])
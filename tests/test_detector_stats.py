@@ -0,0 +1,48 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.DDM import DDM
+from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
+
+DETECTORS = [
+    lambda stats: Adwin(collect_stats=stats),
+    lambda stats: DDM(collect_stats=stats),
+    lambda stats: VolatilityDetector(Adwin(), 8, seed=1, collect_stats=stats),
+    lambda stats: VolatilityDetector(DDM(), 4, seed=1, collect_stats=stats),
+]
+
+
+def make_values(n=6000, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random(n) < np.repeat(rng.random(6) * 0.6 + 0.1, n // 6)).astype(float).tolist()
+
+
+@pytest.mark.parametrize('make', DETECTORS)
+def test_stats_do_not_change_the_outputs(make):
+    values = make_values()
+    plain, counted = make(False), make(True)
+    assert [plain.set_input(v) for v in values] == [counted.set_input(v) for v in values]
+    calls = counted.stats()['calls']
+    assert calls.get('set_input', calls.get('insert_element')) == len(values)
+    counted.enable_stats(False)
+    assert 'calls' not in counted.stats()
+    assert not any(callable(v) for v in vars(counted).values())
+
+
+@pytest.mark.parametrize('stats', [False, True])
+@pytest.mark.parametrize('make', DETECTORS)
+def test_pickle_round_trip(make, stats):
+    values = make_values()
+    detector = make(stats)
+    for v in values[:3000]:
+        detector.set_input(v)
+    restored = pickle.loads(pickle.dumps(detector))
+    assert (restored._stats is not None) == stats
+    assert [detector.set_input(v) for v in values[3000:]] == [restored.set_input(v) for v in values[3000:]]
+    assert detector.to_bytes() == restored.to_bytes()
+    if stats:
+        # the counters restart from zero once unpickled
+        assert sum(restored.stats()['calls'].values()) < sum(detector.stats()['calls'].values())
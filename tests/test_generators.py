@@ -0,0 +1,22 @@
+import pytest
+
+from streams.generators import (BernoulliStream, DriftStream, GaussianStream, SEAStream, STAGGERStream,
+                               VolatilityShiftStream, evenly_spaced)
+
+
+def test_drift_stream_needs_draw():
+    class NoDraw(DriftStream):
+        pass
+
+    with pytest.raises(TypeError):
+        NoDraw(100)
+
+
+@pytest.mark.parametrize('cls', [BernoulliStream, GaussianStream, SEAStream, STAGGERStream, VolatilityShiftStream])
+def test_chunks_cover_the_stream(cls):
+    n = 5000
+    stream = cls(n, evenly_spaced(n, 3), seed=1)
+    chunks = list(stream.chunks(1024))
+    assert len(chunks) == 5
+    first = [c[0] if isinstance(c, tuple) else c for c in chunks]
+    assert sum(len(c) for c in first) == n
@@ -0,0 +1,33 @@
+import pytest
+
+from evluation import instrumentation
+from evluation.instrumentation import Instrumentation
+
+
+@pytest.mark.parametrize('options, refreshed', [
+    ({}, list(range(10))),
+    ({'memory_every': 3}, [0, 3, 6, 9]),
+    ({'memory_interval': 5.0}, [0, 5]),
+    # whichever of memory_every and memory_interval comes first
+    ({'memory_every': 4, 'memory_interval': 2.5}, [0, 3, 6, 9]),
+    ({'memory_every': 2, 'memory_interval': 5.0}, [0, 2, 4, 6, 8]),
+])
+def test_memory_refresh(monkeypatch, options, refreshed):
+    # one second of the monotonic clock per instance
+    clock = [0.0]
+    monkeypatch.setattr(instrumentation, 'monotonic', lambda: clock[0])
+    instr = Instrumentation(**options)
+    found = []
+    for t in range(10):
+        clock[0] = float(t)
+        last = instr.last_instance
+        instr.memory_percent(t)
+        if instr.last_instance != last:
+            found.append(t)
+    assert found == refreshed
+
+
+def test_disabled():
+    instr = Instrumentation(enabled=False)
+    assert instr.memory_percent(0) == 0.0
+    assert instr.stop(instr.start()) == 0.0
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from evluation.metrics import PER_ROW, Edit_distance, Edit_distances, prefix_edit_distances
+from evluation.prequential import get_errors
+
+
+def make_labels(seed, n=200, L=6):
+    rng = np.random.default_rng(seed)
+    Y = (rng.random((n, L)) < 0.4) * 1
+    P = np.where(rng.random((n, L)) < 0.2, 1 - Y, Y)
+    P[:5] = 0
+    Y[:3] = 0
+    return Y, P
+
+
+@pytest.mark.parametrize('J', list(PER_ROW), ids=lambda J: J.__name__)
+def test_per_row_metrics_match_the_averaged_ones(J):
+    Y, P = make_labels(0)
+    per_row = PER_ROW[J](Y, P)
+    assert per_row.shape == (len(Y),)
+    assert np.allclose([J(Y[i:i + 1], P[i:i + 1]) for i in range(len(Y))], per_row)
+    assert np.isclose(per_row.mean(), J(Y, P))
+    np.testing.assert_array_equal(get_errors(Y, P, J=J), per_row)
+
+
+def levenshtein(y, p):
+    previous = list(range(len(p) + 1))
+    for i, a in enumerate(y):
+        current = [i + 1]
+        for j, b in enumerate(p):
+            current.append(min(current[j] + 1, previous[j + 1] + 1, previous[j] + (a != b)))
+        previous = current
+    return previous[-1]
+
+
+def test_prefix_edit_distances():
+    rng = np.random.default_rng(1)
+    Y = rng.integers(0, 3, (50, 7))
+    P = np.where(rng.random((50, 7)) < 0.3, rng.integers(0, 3, (50, 7)), Y)
+    D = prefix_edit_distances(Y, P)
+    expected = [[levenshtein(Y[i, :j + 1].tolist(), P[i, :j + 1].tolist()) for j in range(7)] for i in range(50)]
+    np.testing.assert_array_equal(D, expected)
+    assert np.isclose(Edit_distance(Y, P), D[:, -1].mean())
+    np.testing.assert_allclose(Edit_distances(Y, P), D.mean(axis=0) / np.arange(1, 8))
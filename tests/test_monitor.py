@@ -0,0 +1,61 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.DDM import DDM
+from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
+from service.monitor import DriftMonitor, detect, iterate
+from streams.generators import BernoulliStream, evenly_spaced
+
+
+def factory(key):
+    return [Adwin, DDM, lambda: VolatilityDetector(Adwin(), 4, seed=0)][key % 3]()
+
+
+def make_events(n_keys=30, n=1500):
+    rng = np.random.default_rng(0)
+    streams = dict((k, BernoulliStream(n, evenly_spaced(n, 2), seed=k).generate()) for k in range(n_keys))
+    order = np.repeat(np.arange(n_keys), n)
+    rng.shuffle(order)
+    seen = dict.fromkeys(range(n_keys), 0)
+    events = []
+    for t, k in enumerate(order.tolist()):
+        events.append((k, float(streams[k][seen[k]]), float(t)))
+        seen[k] += 1
+    return streams, events
+
+
+def test_monitor_matches_the_detectors():
+    streams, events = make_events()
+    found = []
+
+    async def sink(event):
+        if event.key == 5:
+            # a slow key only holds up its own queue
+            await asyncio.sleep(0.001)
+        found.append(event)
+
+    monitor = DriftMonitor(factory, sink, max_batch=64, queue_size=32)
+    asyncio.run(monitor.run(iterate(events)))
+    assert monitor.events_seen == len(events)
+    expected = sorted((k, kind, i) for k in streams for kind, i in detect(factory(k), streams[k]))
+    assert len(expected) > 0
+    assert sorted((e.key, e.kind, e.position) for e in found) == expected
+    timestamps = {}
+    for k, _, t in events:
+        timestamps.setdefault(k, []).append(t)
+    assert all(e.timestamp == timestamps[e.key][e.position] for e in found)
+
+
+def test_failing_sink_is_raised():
+    _, events = make_events()
+
+    async def sink(event):
+        if event.key == 1:
+            raise ValueError('sink failed')
+
+    monitor = DriftMonitor(factory, sink, max_batch=16, queue_size=4)
+    with pytest.raises(ValueError):
+        asyncio.run(asyncio.wait_for(monitor.run(iterate(events)), 60))
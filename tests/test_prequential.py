@@ -0,0 +1,85 @@
+import copy
+
+import numpy as np
+import pytest
+from sklearn.naive_bayes import GaussianNB
+
+from classifiers.detector_classifier import DetectorClassifier
+from evluation.prequential import attach_array, prequential_evaluation, share_array
+
+
+class AlwaysWarning(object):
+    """A detector that never finds a drift and stays in its warning zone"""
+    is_warning_zone = True
+
+    def set_input(self, value):
+        return False
+
+
+def make_stream(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, 4))
+    Y = (X[:, :1] > 0.5).astype(int)
+    return X, Y
+
+
+@pytest.mark.filterwarnings('ignore::sklearn.exceptions.DataConversionWarning')
+def test_parallel_models_left_in_warning_zone():
+    X, Y = make_stream()
+    H = [DetectorClassifier(GaussianNB(), AlwaysWarning()), GaussianNB()]
+    expected = [copy.deepcopy(h) for h in H]
+    E_expected = prequential_evaluation(X, Y, expected, 100, batch_size=10)
+
+    E = prequential_evaluation(X, Y, H, 100, batch_size=10, n_jobs=2)
+
+    np.testing.assert_array_equal(E[0], E_expected[0])
+    # the background buffer of the returned classifier outlives the shared memory of the workers
+    assert len(H[0].buffer) > 0
+    buffered = np.concatenate([b[0] for b in H[0].buffer])
+    np.testing.assert_array_equal(buffered, np.concatenate([b[0] for b in expected[0].buffer]))
+
+
+@pytest.mark.filterwarnings('ignore::sklearn.exceptions.DataConversionWarning')
+@pytest.mark.parametrize('batch_size', [1, 25])
+def test_block_prequential_matches_a_manual_loop(batch_size):
+    X, Y = make_stream(300)
+    E_pred, E_time, E_usage = prequential_evaluation(X, Y, [GaussianNB()], 100, batch_size=batch_size)
+    assert E_pred.shape == (1, 200, 1) and E_time.shape == E_usage.shape == (1, 200)
+    h = GaussianNB().fit(X[:100], Y[:100])
+    for t in range(100, 300, batch_size):
+        np.testing.assert_array_equal(E_pred[0, t - 100:t - 100 + batch_size, 0], h.predict(X[t:t + batch_size]))
+        h.partial_fit(X[t:t + batch_size], Y[t:t + batch_size])
+
+
+@pytest.mark.parametrize('order', ['C', 'F'])
+def test_shared_arrays(tmp_path, order):
+    X = np.arange(400.).reshape(40, 10)
+    path = str(tmp_path / 'X.bin')
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 4112)
+        f.write(X.tobytes(order=order))
+    M = np.memmap(path, dtype=float, mode='r', offset=4112, shape=X.shape, order=order)
+    for A in (M, M[5:], M[5:9], M[:, 3:6], M.T[2:], X[::2]):
+        shm, spec = share_array(A)
+        handle, B = attach_array(spec)
+        try:
+            # contiguous views of the memmap are shared through its file, at their own offset
+            assert (spec[0] == 'file') == (isinstance(A, np.memmap) and (A.flags.c_contiguous or A.flags.f_contiguous))
+            np.testing.assert_array_equal(B, A)
+        finally:
+            del B
+            if shm is not None:
+                handle.close()
+                shm.close()
+                shm.unlink()
+
+
+@pytest.mark.filterwarnings('ignore::sklearn.exceptions.DataConversionWarning')
+def test_parallel_memmap_slices(tmp_path):
+    X, Y = make_stream()
+    path = str(tmp_path / 'X.npy')
+    np.save(path, np.vstack((np.zeros((50, 4)), X)))
+    X_mapped = np.load(path, mmap_mode='r')[50:]
+    expected = prequential_evaluation(X, Y, [GaussianNB(), GaussianNB()], 100, batch_size=10)
+    E = prequential_evaluation(X_mapped, Y, [GaussianNB(), GaussianNB()], 100, batch_size=10, n_jobs=2)
+    np.testing.assert_array_equal(E[0], expected[0])
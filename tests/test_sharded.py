@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.DDM import DDM
+from service.monitor import detect
+from service.sharded import ShardedDetectors
+
+
+def factory(key):
+    return DDM() if key % 2 else Adwin()
+
+
+class Exiting(Adwin):
+    """A detector whose worker process exits on its first batch"""
+
+    def set_input_many(self, values):
+        os._exit(3)
+
+
+def exiting_factory(key):
+    return Exiting()
+
+
+def make_events(n_keys=20, n=40000):
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, n_keys, n)
+    values = (rng.random(n) < np.where(np.arange(n) < n // 2, 0.1, 0.5)) * 1.
+    return keys, values, np.arange(n) * 1.0
+
+
+def expected_events(keys, values, timestamps):
+    expected = []
+    for k in np.unique(keys).tolist():
+        index = np.flatnonzero(keys == k)
+        for kind, i in detect(factory(k), values[index]):
+            expected.append((k, kind, timestamps[index[i]], i))
+    return sorted(expected)
+
+
+@pytest.mark.parametrize('capacity', [1 << 16, 64])
+def test_sharded_results_match_a_single_process(capacity):
+    keys, values, timestamps = make_events()
+    found = []
+    with ShardedDetectors(factory, n_shards=3, capacity=capacity, max_batch=512) as detectors:
+        for c in range(0, len(keys), 5000):
+            detectors.submit(keys[c:c + 5000], values[c:c + 5000], timestamps[c:c + 5000])
+            if c == 10000:
+                # the detectors move with their state
+                detectors.migrate(3, (int(detectors.shard_of([3])[0]) + 1) % 3)
+            if c == 25000:
+                detectors.rebalance()
+            found += detectors.results()
+        detectors.flush()
+        found += detectors.results()
+    expected = expected_events(keys, values, timestamps)
+    assert len(expected) > 0
+    assert sorted(tuple(e) for e in found) == expected
+
+
+def test_dead_worker_is_raised():
+    keys, values, _ = make_events(n=2000)
+    with pytest.raises(RuntimeError):
+        with ShardedDetectors(exiting_factory, n_shards=2, capacity=64) as detectors:
+            for c in range(0, len(keys), 64):
+                detectors.submit(keys[c:c + 64], values[c:c + 64])
+            detectors.flush()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.adwin_schedulers import SCHEDULERS
+from drift_detector.DDM import DDM
+from drift_detector.snapshot import detector_from_bytes
+from drift_detector.stream_volatility.volatility_detector import VolatilityDetector
+
+DETECTORS = [
+    Adwin,
+    lambda: Adwin(max_rows=6),
+    lambda: Adwin(max_window=500),
+    DDM,
+    lambda: VolatilityDetector(Adwin(), 8, seed=1),
+    lambda: VolatilityDetector(DDM(), 4, seed=1),
+]
+
+
+def make_values(n=12000, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random(n) < np.repeat(rng.random(12) * 0.6 + 0.1, n // 12)).astype(float)
+
+
+@pytest.mark.parametrize('make', DETECTORS)
+def test_round_trip(make):
+    values = make_values()
+    detector = make()
+    for v in values[:6000].tolist():
+        detector.set_input(v)
+    blob = detector.to_bytes()
+    restored = detector_from_bytes(blob)
+    assert type(restored) is type(detector)
+    assert restored.to_bytes() == blob
+    rest = values[6000:].tolist()
+    assert [detector.set_input(v) for v in rest] == [restored.set_input(v) for v in rest]
+    assert detector.to_bytes() == restored.to_bytes()
+
+
+@pytest.mark.parametrize('make', DETECTORS)
+def test_snapshots_are_canonical(make):
+    values = make_values()
+    one, many = make(), make()
+    for v in values.tolist():
+        one.set_input(v)
+    many.set_input_many(values)
+    assert one.to_bytes() == many.to_bytes()
+
+
+def test_scheduler_round_trip():
+    values = make_values()
+    for tag, scheduler in SCHEDULERS.items():
+        detector = Adwin(scheduler=scheduler())
+        detector.set_input_many(values[:6000])
+        restored = Adwin.from_bytes(detector.to_bytes())
+        assert type(restored.scheduler) is scheduler
+        assert detector.set_input_many(values[6000:])[0].tolist() == restored.set_input_many(values[6000:])[0].tolist()
+
+
+def test_other_class_or_version_is_refused():
+    blob = DDM().to_bytes()
+    with pytest.raises(ValueError):
+        Adwin.from_bytes(blob)
+    with pytest.raises(ValueError):
+        DDM.from_bytes(blob[:2] + bytes([blob[2] + 1]) + blob[3:])
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from drift_detector.adwin import Adwin
+from drift_detector.DDM import DDM
+from drift_detector.stream_volatility.buffer import Buffer
+from drift_detector.stream_volatility.reservoir import Reservoir
+from drift_detector.stream_volatility.volatility_detector import VolatilityDetector, volatility_shifts
+
+
+def test_buffer_keeps_the_last_values():
+    rng = np.random.default_rng(0)
+    values = rng.integers(1, 500, 200).tolist()
+    buffer = Buffer(32)
+    for i, v in enumerate(values):
+        removed = buffer.add(v)
+        assert removed == (values[i - 32] if i >= 32 else -1)
+        window = np.array(values[max(0, i - 31):i + 1], dtype=float)
+        assert buffer.get_count() == len(window)
+        assert np.isclose(buffer.get_mean(), window.mean())
+        if len(window) > 1:
+            assert np.isclose(buffer.get_stddev(), window.std())
+    buffer.clear()
+    assert buffer.get_count() == 0
+
+
+def test_reservoir_statistics_and_seed():
+    rng = np.random.default_rng(1)
+    values = rng.integers(1, 500, 1000).tolist()
+    first, second = Reservoir(16, seed=5, block_size=7), Reservoir(16, seed=5, block_size=7)
+    for v in values:
+        first.add_element(v)
+        second.add_element(v)
+        elements = np.array(first.elements[:first.get_count()], dtype=float)
+        assert np.isclose(first.get_reservoir_mean(), elements.mean())
+    assert first.check_full()
+    assert first.elements == second.elements
+    assert np.isclose(first.get_stddev(), np.std(first.elements))
+    assert set(first.elements) <= set(values)
+
+
+@pytest.mark.parametrize('make_detector', [Adwin, DDM])
+def test_set_input_many_matches_set_input(make_detector):
+    rng = np.random.default_rng(2)
+    n = 30000
+    values = (rng.random(n) < np.repeat(rng.uniform(0.05, 0.6, 60), n // 60)).astype(float)
+    one = VolatilityDetector(make_detector(), 8, seed=3)
+    many = VolatilityDetector(make_detector(), 8, seed=3)
+    shifts = [i for i, v in enumerate(values.tolist()) if one.set_input(v)]
+    many_shifts = []
+    for lo, hi in ((0, 1), (1, 7000), (7000, n)):
+        vol_drift_index, drift_index = many.set_input_many(values[lo:hi])
+        many_shifts += (vol_drift_index + lo).tolist()
+    assert len(shifts) > 0
+    assert shifts == many_shifts
+    assert one.to_bytes() == many.to_bytes()
+
+
+class Flags(object):
+    """A drift detector replaying a precomputed 0/1 drift mask"""
+
+    def set_input(self, value):
+        return value == 1
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_offline_volatility_shifts_match_the_detector(seed):
+    rng = np.random.default_rng(seed)
+    size = [1, 2, 3, 8, 32, 8][seed]
+    n = int(rng.integers(1000, 20000))
+    rate = np.repeat(rng.choice([0.01, 0.05, 0.3, 0.9], 20), n // 20 + 1)[:n]
+    mask = rng.random(n) < rate
+    vol_drift_index, drift_index = VolatilityDetector(Flags(), size, seed=seed).set_input_many(mask * 1.)
+    shifts, drifts = volatility_shifts(mask, size, seed=seed)[:2]
+    np.testing.assert_array_equal(shifts, vol_drift_index)
+    np.testing.assert_array_equal(drifts, drift_index)
+    np.testing.assert_array_equal(volatility_shifts(np.flatnonzero(mask), size, seed=seed)[0], shifts)
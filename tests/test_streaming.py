@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from evluation.streaming import FadingMean, WindowMean
+
+
+@pytest.mark.parametrize('block', [1, 7, 50, 120])
+def test_window_mean(block):
+    rng = np.random.default_rng(0)
+    values = rng.random((3, 1000))
+    mean = WindowMean(3, window=50)
+    for t in range(0, 1000, block):
+        end = min(t + block, 1000)
+        mean.update(values[:, t:end])
+        seen = values[:, max(0, end - 50):end]
+        np.testing.assert_allclose(mean.get(), seen.mean(axis=1))
+
+
+@pytest.mark.parametrize('block', [1, 9])
+def test_fading_mean(block):
+    rng = np.random.default_rng(1)
+    values = rng.random((2, 300))
+    mean = FadingMean(2, alpha=0.98)
+    for t in range(0, 300, block):
+        mean.update(values[:, t:t + block])
+    weights = 0.98 ** np.arange(299, -1, -1)
+    np.testing.assert_allclose(mean.get(), values.dot(weights) / weights.sum())